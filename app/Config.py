@@ -1,7 +1,20 @@
-from typing import Literal, Optional
+from typing import Dict, List, Literal, Optional
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+DEFAULT_PHRASE_BANK = {
+    "assistant_error": "I apologize, but I encountered an error processing your request.",
+    "request_timeout": "Request timed out",
+    "greeting_english": "Hello! How can I help you today?",
+    "greeting_hindi": "नमस्ते! मैं आपकी क्या सहायता कर सकती हूँ?",
+    "llm_error_english": "I apologize, but I encountered an error while processing your request. Please try again.",
+    "llm_error_hindi": "क्षमा करें, आपके अनुरोध को प्रोसेस करने में त्रुटि हुई है। कृपया पुनः प्रयास करें।",
+    "llm_error_hinglish": "Sorry, आपके request को process करने में error हुई है। Please फिर से try करें।",
+}
+
+COMPACT_BITRATES_KBPS = (32, 64, 96, 128, 192)
+
+
 class Settings(BaseSettings):
     GROQ_API_KEY: str
     SERP_API_KEY:str
@@ -31,6 +44,71 @@ class Settings(BaseSettings):
     ELEVENLABS_API_KEY: str
     ELEVENLABS_MODEL_ID: str
     EXA_API_KEY: Optional[str] = None
+    ELEVENLABS_API_BASE_URL: Optional[str] = "https://api.elevenlabs.io"
+    TTS_PROVIDER: Optional[str] = "elevenlabs"
+    TTS_VOICE_BACKENDS: Optional[Dict[str, str]] = {}
+    TTS_HEDGE_ENABLED: Optional[bool] = False
+    TTS_HEDGE_BACKEND: Optional[str] = None
+    TTS_HEDGE_PERCENTILE: Optional[float] = 95.0
+    TTS_HEDGE_MIN_SAMPLES: Optional[int] = 20
+    TTS_HEDGE_WINDOW_SIZE: Optional[int] = 200
+    TTS_HEDGE_MAX_RATE: Optional[float] = 0.05
+    TTS_HEDGE_BUDGET_WINDOW_SECONDS: Optional[float] = 60.0
+    TTS_HTTP_POOL_SIZE: Optional[int] = 20
+    TTS_HTTP_CONNECT_TIMEOUT: Optional[float] = 5.0
+    TTS_HTTP_READ_TIMEOUT: Optional[float] = 30.0
+    TTS_HTTP_KEEPALIVE_EXPIRY: Optional[float] = 60.0
+    TTS_HTTP2_ENABLED: Optional[bool] = True
+    TTS_CACHE_ENABLED: Optional[bool] = True
+    TTS_CACHE_MAX_BYTES: Optional[int] = 512 * 1024 * 1024
+    TTS_CACHE_MAX_ENTRIES: Optional[int] = 5000
+    TTS_MAX_WORKERS: Optional[int] = 3
+    TTS_QUEUE_AGING_SECONDS: Optional[float] = 2.0
+    TTS_MAX_QUEUE_SIZE: Optional[int] = 50
+    TTS_ADMISSION_POLICY: Optional[Literal["reject", "degrade", "drop_lowest"]] = "degrade"
+    TTS_ADMISSION_MAX_WAIT_SECONDS: Optional[float] = 10.0
+    AUDIO_RETENTION_MAX_BYTES: Optional[int] = 1024 * 1024 * 1024
+    AUDIO_RETENTION_MAX_AGE_SECONDS: Optional[float] = 24 * 60 * 60
+    AUDIO_RETENTION_MAX_FILES: Optional[int] = 10000
+    AUDIO_JANITOR_INTERVAL_SECONDS: Optional[float] = 300.0
+    AUDIO_JANITOR_BATCH_SIZE: Optional[int] = 200
+    TTS_SEGMENTED_SYNTHESIS: Optional[bool] = False
+    TTS_SEGMENTED_MIN_TEXT_CHARS: Optional[int] = 200
+    TTS_BATCH_CONCURRENCY: Optional[int] = 4
+    TTS_BATCH_MAX_CONCURRENCY: Optional[int] = 16
+    TTS_BATCH_MAX_LINES: Optional[int] = 10000
+    TTS_COMPACT_CODEC: Optional[Literal["opus", "mp3"]] = "opus"
+    TTS_COMPACT_BITRATE_KBPS: Optional[int] = 32
+    STT_PROVIDER: Optional[str] = "groq"
+    STT_VAD_DETECTOR: Optional[Literal["energy", "spectral"]] = "energy"
+    STT_VAD_THRESHOLD: Optional[float] = None
+    STT_VAD_MIN_SPEECH_SECONDS: Optional[float] = 1.0
+    STT_VAD_SILENCE_SECONDS: Optional[float] = 1.5
+    STT_MAX_UTTERANCE_SECONDS: Optional[float] = 30.0
+    STT_PRE_ROLL_SECONDS: Optional[float] = 0.3
+    STT_MAX_WORKERS: Optional[int] = 3
+    STT_MAX_IN_FLIGHT: Optional[int] = 6
+    STT_INTERIM_INTERVAL_SECONDS: Optional[float] = 1.0
+    STT_PREFETCH_MIN_WORDS: Optional[int] = 4
+    STT_PREFETCH_MIN_COVERAGE: Optional[float] = 0.6
+    STT_PREFETCH_TTL_SECONDS: Optional[float] = 30.0
+    TASK_REGISTRY_TTL_SECONDS: Optional[float] = 300.0
+    TASK_REGISTRY_MAX_ENTRIES: Optional[int] = 10000
+    PHRASE_BANK_ENABLED: Optional[bool] = True
+    PHRASE_BANK_VOICES: Optional[List[str]] = []
+    PHRASE_BANK: Optional[Dict[str, str]] = DEFAULT_PHRASE_BANK
+
+    @field_validator("PHRASE_BANK")
+    @classmethod
+    def merge_phrase_bank_defaults(cls, value):
+        return {**DEFAULT_PHRASE_BANK, **(value or {})}
+
+    @field_validator("TTS_COMPACT_BITRATE_KBPS")
+    @classmethod
+    def check_compact_bitrate(cls, value):
+        if value is not None and value not in COMPACT_BITRATES_KBPS:
+            raise ValueError(f"TTS_COMPACT_BITRATE_KBPS must be one of {', '.join(map(str, COMPACT_BITRATES_KBPS))}")
+        return value
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
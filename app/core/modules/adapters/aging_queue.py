@@ -0,0 +1,133 @@
+import time
+import queue
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+DEFAULT_AGING_INTERVAL = 2.0
+WAIT_TIME_SMOOTHING = 0.2
+
+
+class AgingPriorityQueue:
+    def __init__(self, maxsize: int = 0, aging_interval: float = DEFAULT_AGING_INTERVAL):
+        self.maxsize = maxsize
+        self.aging_interval = aging_interval
+        self.levels: Dict[int, deque] = {}
+        self.size = 0
+        self.closed = False
+        self.wait_stats: Dict[int, Dict[str, float]] = {}
+        self.mutex = threading.Lock()
+        self.not_empty = threading.Condition(self.mutex)
+        self.not_full = threading.Condition(self.mutex)
+
+    def put(self, priority: int, item: Any, block: bool = True, timeout: Optional[float] = None) -> None:
+        with self.not_full:
+            if self.maxsize > 0 and self.size >= self.maxsize:
+                if not block:
+                    raise queue.Full
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while self.size >= self.maxsize:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise queue.Full
+                    self.not_full.wait(remaining)
+
+            self.levels.setdefault(priority, deque()).append((time.monotonic(), item))
+            self.size += 1
+            self.not_empty.notify()
+
+    def put_nowait(self, priority: int, item: Any) -> None:
+        self.put(priority, item, block=False)
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        with self.not_empty:
+            if not block and self.size == 0:
+                raise queue.Empty
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self.size == 0:
+                if self.closed:
+                    raise queue.Empty
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self.not_empty.wait(remaining)
+
+            now = time.monotonic()
+            priority = self._select_level(now)
+            enqueued_at, item = self.levels[priority].popleft()
+            self.size -= 1
+            self._record_wait(priority, now - enqueued_at)
+            self.not_full.notify()
+            return item
+
+    def get_nowait(self) -> Any:
+        return self.get(block=False)
+
+    def drop_lowest(self, below_priority: int) -> Optional[Any]:
+        with self.mutex:
+            candidates = [priority for priority, level in self.levels.items() if level and priority < below_priority]
+            if not candidates:
+                return None
+            _, item = self.levels[min(candidates)].pop()
+            self.size -= 1
+            self.not_full.notify()
+            return item
+
+    def close(self) -> None:
+        with self.mutex:
+            self.closed = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+
+    def reopen(self) -> None:
+        with self.mutex:
+            self.closed = False
+
+    def qsize(self) -> int:
+        with self.mutex:
+            return self.size
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        with self.mutex:
+            return self.maxsize > 0 and self.size >= self.maxsize
+
+    def get_metrics(self) -> Dict[int, Dict[str, float]]:
+        now = time.monotonic()
+        with self.mutex:
+            metrics = {}
+            for priority in sorted(set(self.levels) | set(self.wait_stats), reverse=True):
+                level = self.levels.get(priority)
+                stats = self.wait_stats.get(priority, {})
+                metrics[priority] = {
+                    "depth": len(level) if level else 0,
+                    "oldest_wait_seconds": (now - level[0][0]) if level else 0.0,
+                    "avg_wait_seconds": stats.get("avg", 0.0),
+                    "max_wait_seconds": stats.get("max", 0.0),
+                    "last_wait_seconds": stats.get("last", 0.0),
+                    "dequeued": int(stats.get("count", 0)),
+                }
+            return metrics
+
+    def _select_level(self, now: float) -> int:
+        best_priority = None
+        best_score = None
+        for priority, level in self.levels.items():
+            if not level:
+                continue
+            score = priority
+            if self.aging_interval > 0:
+                score += (now - level[0][0]) / self.aging_interval
+            if best_score is None or score > best_score:
+                best_priority = priority
+                best_score = score
+        return best_priority
+
+    def _record_wait(self, priority: int, wait_seconds: float) -> None:
+        stats = self.wait_stats.setdefault(priority, {"avg": wait_seconds, "max": 0.0, "last": 0.0, "count": 0})
+        stats["avg"] += WAIT_TIME_SMOOTHING * (wait_seconds - stats["avg"])
+        stats["max"] = max(stats["max"], wait_seconds)
+        stats["last"] = wait_seconds
+        stats["count"] += 1
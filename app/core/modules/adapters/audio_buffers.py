@@ -0,0 +1,136 @@
+import struct
+from typing import Iterable, List
+
+PCM_SAMPLE_RATE = 16000
+PCM_SAMPLE_WIDTH = 2
+PCM_CHANNELS = 1
+
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+WAV_HEADER_BYTES = WAV_HEADER.size
+
+DEFAULT_UTTERANCE_SECONDS = 10.0
+DEFAULT_PRE_ROLL_SECONDS = 0.3
+
+
+def _wav_header_fields(data_bytes: int, sample_rate: int) -> tuple:
+    block_align = PCM_CHANNELS * PCM_SAMPLE_WIDTH
+    return (
+        b"RIFF", WAV_HEADER_BYTES - 8 + data_bytes, b"WAVE",
+        b"fmt ", 16, 1, PCM_CHANNELS, sample_rate, sample_rate * block_align, block_align, PCM_SAMPLE_WIDTH * 8,
+        b"data", data_bytes
+    )
+
+
+def wav_header(data_bytes: int, sample_rate: int = PCM_SAMPLE_RATE) -> bytes:
+    return WAV_HEADER.pack(*_wav_header_fields(data_bytes, sample_rate))
+
+
+def encode_wav_frames(frames: Iterable[bytes], sample_rate: int = PCM_SAMPLE_RATE) -> bytes:
+    frames = frames if isinstance(frames, list) else list(frames)
+    return b"".join([wav_header(sum(len(frame) for frame in frames), sample_rate), *frames])
+
+
+def encode_wav(pcm: bytes, sample_rate: int = PCM_SAMPLE_RATE) -> bytes:
+    return encode_wav_frames([pcm], sample_rate)
+
+
+def wav_pcm(wav: bytes) -> memoryview:
+    return memoryview(wav)[WAV_HEADER_BYTES:]
+
+
+class RingBuffer:
+    __slots__ = ("values", "size", "count", "index", "total")
+
+    def __init__(self, size: int):
+        self.values: List[float] = [0.0] * size
+        self.size = size
+        self.count = 0
+        self.index = 0
+        self.total = 0.0
+
+    def append(self, value: float) -> None:
+        if self.count == self.size:
+            self.total -= self.values[self.index]
+        else:
+            self.count += 1
+        self.values[self.index] = value
+        self.total += value
+        self.index += 1
+        if self.index == self.size:
+            self.index = 0
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def recent(self, n: int) -> List[float]:
+        n = min(n, self.count)
+        if n <= self.index:
+            return self.values[self.index - n:self.index]
+        return self.values[self.index - n:] + self.values[:self.index]
+
+    def clear(self) -> None:
+        self.count = 0
+        self.index = 0
+        self.total = 0.0
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class UtteranceBuffer:
+    def __init__(self, sample_rate: int = PCM_SAMPLE_RATE, initial_seconds: float = DEFAULT_UTTERANCE_SECONDS,
+                 pre_roll_seconds: float = DEFAULT_PRE_ROLL_SECONDS):
+        self.sample_rate = sample_rate
+        self.buffer = bytearray(WAV_HEADER_BYTES + int(initial_seconds * sample_rate) * PCM_SAMPLE_WIDTH)
+        self.view = memoryview(self.buffer)
+        self.end = WAV_HEADER_BYTES
+        self.pre_roll = bytearray(int(pre_roll_seconds * sample_rate) * PCM_SAMPLE_WIDTH)
+        self.pre_roll_index = 0
+        self.pre_roll_filled = 0
+
+    def push_pre_roll(self, frame) -> None:
+        capacity = len(self.pre_roll)
+        if not capacity:
+            return
+        frame = memoryview(frame)[-capacity:]
+        size = len(frame)
+        first = min(size, capacity - self.pre_roll_index)
+        self.pre_roll[self.pre_roll_index:self.pre_roll_index + first] = frame[:first]
+        self.pre_roll[:size - first] = frame[first:]
+        self.pre_roll_index = (self.pre_roll_index + size) % capacity
+        self.pre_roll_filled = min(capacity, self.pre_roll_filled + size)
+
+    def start(self) -> None:
+        self.end = WAV_HEADER_BYTES
+        if self.pre_roll_filled:
+            start = (self.pre_roll_index - self.pre_roll_filled) % len(self.pre_roll)
+            with memoryview(self.pre_roll) as view:
+                self.append(view[start:start + self.pre_roll_filled])
+                self.append(view[:max(0, start + self.pre_roll_filled - len(self.pre_roll))])
+        self.pre_roll_index = 0
+        self.pre_roll_filled = 0
+
+    def append(self, frame) -> None:
+        size = len(frame)
+        if self.end + size > len(self.buffer):
+            self._grow(size)
+        self.view[self.end:self.end + size] = frame
+        self.end += size
+
+    def _grow(self, size: int) -> None:
+        self.view.release()
+        self.buffer.extend(bytes(max(size, len(self.buffer))))
+        self.view = memoryview(self.buffer)
+
+    def to_wav(self) -> bytes:
+        WAV_HEADER.pack_into(self.buffer, 0, *_wav_header_fields(len(self), self.sample_rate))
+        return bytes(self.view[:self.end])
+
+    def to_pcm(self) -> bytes:
+        return bytes(self.view[WAV_HEADER_BYTES:self.end])
+
+    def clear(self) -> None:
+        self.end = WAV_HEADER_BYTES
+
+    def __len__(self) -> int:
+        return self.end - WAV_HEADER_BYTES
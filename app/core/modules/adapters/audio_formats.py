@@ -0,0 +1,106 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from app.Config import ENV_SETTINGS
+
+MP3_SUFFIX = ".mp3"
+OGG_SUFFIX = ".ogg"
+WAV_SUFFIX = ".wav"
+
+MEDIA_TYPES_BY_SUFFIX = {
+    MP3_SUFFIX: "audio/mpeg",
+    OGG_SUFFIX: "audio/ogg",
+    WAV_SUFFIX: "audio/wav",
+}
+
+ACCEPT_ALIASES = {
+    "audio/ogg": "opus",
+    "audio/opus": "opus",
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+    "audio/wav": "wav",
+    "audio/x-wav": "wav",
+    "audio/wave": "wav",
+}
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    name: str
+    codec: str
+    sample_rate: int
+    bitrate_kbps: int = 0
+
+    @property
+    def file_suffix(self) -> str:
+        return {"mp3": MP3_SUFFIX, "opus": OGG_SUFFIX}.get(self.codec, WAV_SUFFIX)
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES_BY_SUFFIX[self.file_suffix]
+
+    @property
+    def joinable(self) -> bool:
+        return self.codec != "opus"
+
+
+def _compact_bitrate() -> int:
+    return ENV_SETTINGS.TTS_COMPACT_BITRATE_KBPS or 32
+
+
+AUDIO_FORMATS: Dict[str, AudioFormat] = {
+    "mp3": AudioFormat("mp3", "mp3", 44100, 128),
+    "mp3_compact": AudioFormat("mp3_compact", "mp3", 22050 if _compact_bitrate() <= 32 else 44100, _compact_bitrate()),
+    "opus": AudioFormat("opus", "opus", 48000, _compact_bitrate()),
+    "wav": AudioFormat("wav", "pcm", 16000),
+}
+
+
+def get_audio_format(name: Optional[str]) -> Optional[AudioFormat]:
+    return AUDIO_FORMATS.get(name) if name else None
+
+
+def supports_segment_join(name: Optional[str]) -> bool:
+    audio_format = get_audio_format(name)
+    return audio_format is None or audio_format.joinable
+
+
+def _compact_format_name() -> str:
+    return "opus" if (ENV_SETTINGS.TTS_COMPACT_CODEC or "opus") == "opus" else "mp3_compact"
+
+
+def negotiate_audio_format(accept: Optional[str] = None, requested: Optional[str] = None) -> Optional[str]:
+    if requested:
+        requested = requested.lower()
+        if requested == "compact":
+            return _compact_format_name()
+        if requested in AUDIO_FORMATS:
+            return requested
+        raise ValueError(f"Unsupported audio format '{requested}'. Available: compact, {', '.join(AUDIO_FORMATS)}")
+
+    if not accept:
+        return None
+
+    preferences = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        name = ACCEPT_ALIASES.get(media_type.strip().lower())
+        if name and quality > 0:
+            preferences.append((-quality, position, name))
+
+    if not preferences:
+        return None
+    return min(preferences)[2]
+
+
+def media_type_for_path(path: str) -> str:
+    return MEDIA_TYPES_BY_SUFFIX.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
@@ -0,0 +1,171 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUDIO_DIR = "static/audio"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_FILES = 10000
+DEFAULT_INTERVAL_SECONDS = 300.0
+DEFAULT_BATCH_SIZE = 200
+TEMP_FILE_SUFFIXES = (".tmp", ".part")
+
+
+class AudioJanitor:
+    def __init__(self, audio_dir: str = DEFAULT_AUDIO_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS, max_files: int = DEFAULT_MAX_FILES,
+                 interval_seconds: float = DEFAULT_INTERVAL_SECONDS, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.audio_dir = audio_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.max_files = max_files
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.pin_sources: List[Callable[[], Iterable[str]]] = []
+        self.task: Optional[asyncio.Task] = None
+        self.metrics = {
+            "sweeps": 0,
+            "files_reclaimed": 0,
+            "bytes_reclaimed": 0,
+            "pinned_skipped": 0,
+            "errors": 0,
+            "last_sweep_at": 0.0,
+            "last_sweep_seconds": 0.0,
+            "last_file_count": 0,
+            "last_total_bytes": 0,
+        }
+
+    def add_pin_source(self, source: Callable[[], Iterable[str]]) -> None:
+        self.pin_sources.append(source)
+
+    def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run(), name="AudioJanitor")
+
+    async def stop(self) -> None:
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            "running": self.task is not None and not self.task.done(),
+            "max_bytes": self.max_bytes,
+            "max_age_seconds": self.max_age_seconds,
+            "max_files": self.max_files,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.metrics["errors"] += 1
+                logger.error(f"Audio janitor sweep failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def sweep(self) -> Dict[str, int]:
+        started = time.time()
+        entries = await asyncio.to_thread(self._scan)
+        pinned = self._collect_pinned()
+
+        now = time.time()
+        total_bytes = sum(size for _, _, size, _ in entries)
+        file_count = len(entries)
+        victims = []
+        survivors = []
+
+        for entry in entries:
+            path, name, size, mtime = entry
+            if name in pinned:
+                self.metrics["pinned_skipped"] += 1
+                continue
+            is_stale_temp = name.endswith(TEMP_FILE_SUFFIXES) and now - mtime > self.interval_seconds
+            if is_stale_temp or now - mtime > self.max_age_seconds:
+                victims.append(entry)
+                total_bytes -= size
+                file_count -= 1
+            else:
+                survivors.append(entry)
+
+        survivors.sort(key=lambda entry: entry[3])
+        for entry in survivors:
+            if total_bytes <= self.max_bytes and file_count <= self.max_files:
+                break
+            victims.append(entry)
+            total_bytes -= entry[2]
+            file_count -= 1
+
+        reclaimed_files = 0
+        reclaimed_bytes = 0
+        for offset in range(0, len(victims), self.batch_size):
+            batch = victims[offset:offset + self.batch_size]
+            files, size = await asyncio.to_thread(self._delete_batch, batch)
+            reclaimed_files += files
+            reclaimed_bytes += size
+            await asyncio.sleep(0)
+
+        self.metrics["sweeps"] += 1
+        self.metrics["files_reclaimed"] += reclaimed_files
+        self.metrics["bytes_reclaimed"] += reclaimed_bytes
+        self.metrics["last_sweep_at"] = started
+        self.metrics["last_sweep_seconds"] = time.time() - started
+        self.metrics["last_file_count"] = file_count
+        self.metrics["last_total_bytes"] = total_bytes
+
+        if reclaimed_files:
+            logger.info(f"Audio janitor reclaimed {reclaimed_files} files ({reclaimed_bytes} bytes)")
+        return {"files_reclaimed": reclaimed_files, "bytes_reclaimed": reclaimed_bytes}
+
+    def _scan(self) -> list:
+        entries = []
+        try:
+            with os.scandir(self.audio_dir) as it:
+                for entry in it:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    if entry.name.startswith(".") and not entry.name.endswith(TEMP_FILE_SUFFIXES):
+                        continue
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    entries.append((entry.path, entry.name, stat.st_size, stat.st_mtime))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _collect_pinned(self) -> Set[str]:
+        pinned = set()
+        for source in self.pin_sources:
+            try:
+                pinned.update(os.path.basename(path) for path in source() if path)
+            except Exception as e:
+                logger.warning(f"Audio janitor pin source failed: {e}")
+        return pinned
+
+    def _delete_batch(self, batch: list) -> tuple:
+        files = 0
+        size = 0
+        for path, _, entry_size, _ in batch:
+            try:
+                os.unlink(path)
+                files += 1
+                size += entry_size
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.metrics["errors"] += 1
+                logger.warning(f"Audio janitor could not remove {path}: {e}")
+        return files, size
@@ -0,0 +1,52 @@
+import os
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class AudioTeeWriter:
+    def __init__(self, path: str, thread_name: str = "TTS-Tee-Writer"):
+        self.path = str(path)
+        self.chunks: "queue.SimpleQueue[bytes]" = queue.SimpleQueue()
+        self.result: Future = Future()
+        self.bytes_written = 0
+        self.thread = threading.Thread(target=self._run, name=thread_name, daemon=True)
+        self.thread.start()
+
+    def write(self, chunk: bytes) -> None:
+        if not self.result.done():
+            self.chunks.put(chunk)
+
+    def _run(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "wb") as tee_file:
+                while True:
+                    chunk = self.chunks.get()
+                    if chunk is None:
+                        break
+                    tee_file.write(chunk)
+                    self.bytes_written += len(chunk)
+        except Exception as e:
+            self.result.set_exception(e)
+        else:
+            self.result.set_result(self.path)
+
+    async def close(self) -> str:
+        self.chunks.put(None)
+        return await asyncio.wrap_future(self.result)
+
+    async def discard(self) -> None:
+        self.chunks.put(None)
+        try:
+            await asyncio.wrap_future(self.result)
+        except Exception:
+            pass
+        await asyncio.to_thread(self._unlink)
+
+    def _unlink(self) -> None:
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
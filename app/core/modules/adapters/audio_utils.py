@@ -3,8 +3,9 @@ import time
 import re
 import html as html_unescape
 from abc import ABC, abstractmethod
+from concurrent.futures import Future
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 class TaskStatus(Enum):
@@ -12,6 +13,7 @@ class TaskStatus(Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    DEFERRED = "deferred"
 
 @dataclass
 class AudioTask:
@@ -22,6 +24,14 @@ class AudioTask:
     status: TaskStatus = TaskStatus.PENDING
     result: Any = None
     error: str = None
+    language: str = None
+    speaker: str = None
+    model_id: str = None
+    audio_format: str = None
+    voice: Any = field(default=None, repr=False, compare=False)
+    completion: Future = field(default_factory=Future, repr=False, compare=False)
+    deadline_timer: int = field(default=None, repr=False, compare=False)
+    resolved_at: float = field(default=None, repr=False, compare=False)
     
     def __post_init__(self):
         if self.timestamp is None:
@@ -0,0 +1,184 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_DIR = "static/audio/.batch"
+DEFAULT_BATCH_CONCURRENCY = 4
+JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class BatchJobConflict(Exception):
+    pass
+
+
+class BatchLine:
+    __slots__ = ("text", "language", "speaker")
+
+    def __init__(self, text: str, language: Optional[str] = None, speaker: Optional[str] = None):
+        self.text = text
+        self.language = language
+        self.speaker = speaker
+
+    def to_list(self) -> list:
+        return [self.text, self.language, self.speaker]
+
+    def content_hash(self) -> str:
+        payload = json.dumps(self.to_list(), ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class BatchRenderer:
+    def __init__(self, tts_instance, journal_dir: str = DEFAULT_JOURNAL_DIR,
+                 concurrency: int = DEFAULT_BATCH_CONCURRENCY):
+        self.tts_instance = tts_instance
+        self.journal_dir = journal_dir
+        self.concurrency = concurrency
+        self.running: Set[str] = set()
+
+    @staticmethod
+    def job_id_for(lines: List[BatchLine]) -> str:
+        payload = json.dumps([line.to_list() for line in lines], ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def _job_path(self, job_id: str, suffix: str) -> str:
+        if not isinstance(job_id, str) or not JOB_ID_PATTERN.match(job_id):
+            raise ValueError(f"Invalid batch job id '{job_id}'")
+        root = os.path.realpath(self.journal_dir)
+        path = os.path.realpath(os.path.join(root, f"{job_id}{suffix}"))
+        if os.path.dirname(path) != root:
+            raise ValueError(f"Invalid batch job id '{job_id}'")
+        return path
+
+    def _journal_path(self, job_id: str) -> str:
+        return self._job_path(job_id, ".jsonl")
+
+    def _manifest_path(self, job_id: str) -> str:
+        return self._job_path(job_id, ".json")
+
+    def check(self, job_id: str) -> str:
+        self._journal_path(job_id)
+        if job_id in self.running:
+            raise BatchJobConflict(f"Batch job {job_id} is already running")
+        return job_id
+
+    def reserve(self, job_id: str) -> str:
+        self.running.add(self.check(job_id))
+        return job_id
+
+    def release(self, job_id: str) -> None:
+        self.running.discard(job_id)
+
+    def _write_manifest(self, job_id: str, manifest: Dict[str, Any]) -> None:
+        os.makedirs(self.journal_dir, exist_ok=True)
+        with open(self._manifest_path(job_id), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+    def _append_journal(self, job_id: str, records: List[Dict[str, Any]]) -> None:
+        with open(self._journal_path(job_id), "a", encoding="utf-8") as journal:
+            journal.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+    def _pending_lines(self, job_id: str, lines: List[BatchLine]) -> List[int]:
+        previous = self.load_journal(job_id)
+        pending = []
+        for index, line in enumerate(lines):
+            record = previous.get(index, {})
+            if not (record.get("status") == "rendered" and record.get("line_hash") == line.content_hash()
+                    and os.path.exists(record.get("audio_file") or "")):
+                pending.append(index)
+        return pending
+
+    def load_journal(self, job_id: str) -> Dict[int, Dict[str, Any]]:
+        records: Dict[int, Dict[str, Any]] = {}
+        try:
+            with open(self._journal_path(job_id), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    records[record["index"]] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._manifest_path(job_id), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        records = self.load_journal(job_id)
+        rendered = sum(1 for record in records.values() if record["status"] == "rendered")
+        failed = sum(1 for record in records.values() if record["status"] == "failed")
+        return {
+            **manifest,
+            "rendered": rendered,
+            "failed": failed,
+            "remaining": manifest["total"] - rendered - failed,
+            "running": job_id in self.running,
+        }
+
+    async def run(self, lines: List[BatchLine], job_id: Optional[str] = None,
+                  concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        job_id = self.reserve(job_id or self.job_id_for(lines))
+
+        try:
+            await asyncio.to_thread(self._write_manifest, job_id,
+                                    {"job_id": job_id, "total": len(lines), "created": time.time()})
+            pending = await asyncio.to_thread(self._pending_lines, job_id, lines)
+            started = time.time()
+            yield {"event": "start", "job_id": job_id, "total": len(lines),
+                   "resumed": len(lines) - len(pending), "pending": len(pending)}
+
+            counts = {"rendered": 0, "failed": 0}
+            async for record in self._render_window(lines, pending, max(1, concurrency or self.concurrency)):
+                await asyncio.to_thread(self._append_journal, job_id, [record])
+                counts[record["status"]] += 1
+                yield {"event": "progress", "job_id": job_id, "done": sum(counts.values()),
+                       "of": len(pending), **record}
+
+            yield {"event": "complete", "job_id": job_id, "total": len(lines),
+                   "resumed": len(lines) - len(pending), **counts, "seconds": time.time() - started}
+        finally:
+            self.release(job_id)
+
+    async def _render_window(self, lines: List[BatchLine], pending: List[int],
+                             concurrency: int) -> AsyncIterator[Dict[str, Any]]:
+        queued = iter(pending)
+        in_flight: Set[asyncio.Task] = set()
+        try:
+            while True:
+                while len(in_flight) < concurrency:
+                    index = next(queued, None)
+                    if index is None:
+                        break
+                    in_flight.add(asyncio.ensure_future(self._render_line(index, lines[index])))
+                if not in_flight:
+                    return
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    async def _render_line(self, index: int, line: BatchLine) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            voice = self.tts_instance.resolve_voice_params(line.text, language=line.language, speaker=line.speaker)
+            audio_file = await self.tts_instance._synthesize_to_file(line.text, voice=voice)
+            return {"index": index, "status": "rendered", "line_hash": line.content_hash(), "audio_file": audio_file,
+                    "language": voice.language, "speaker": voice.speaker,
+                    "seconds": time.monotonic() - started}
+        except Exception as e:
+            logger.error(f"Batch line {index} failed: {e}")
+            return {"index": index, "status": "failed", "line_hash": line.content_hash(), "error": str(e),
+                    "seconds": time.monotonic() - started}
@@ -0,0 +1,164 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from .tts_cache import make_cache_key
+from .tts_utils import VoiceParams
+
+logger = logging.getLogger(__name__)
+
+PHRASE_FILE_PREFIX = "phrase_"
+
+
+class PhraseAudio:
+    __slots__ = ("name", "text", "voice", "path", "audio")
+
+    def __init__(self, name: str, text: str, voice: VoiceParams, path: str, audio: bytes):
+        self.name = name
+        self.text = text
+        self.voice = voice
+        self.path = path
+        self.audio = audio
+
+
+class PhraseBank:
+    def __init__(self, tts_instance, audio_dir: str):
+        self.tts_instance = tts_instance
+        self.audio_dir = audio_dir
+        self.entries: Dict[str, PhraseAudio] = {}
+        self.names: Dict[str, List[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.warm_errors = 0
+        self.warm_seconds = 0.0
+        self.warm_task: Optional[asyncio.Task] = None
+        self.lock = threading.Lock()
+
+    def start_warmup(self, phrases: Dict[str, str], voices: Iterable[str] = ()) -> None:
+        if self.warm_task is None or self.warm_task.done():
+            self.warm_task = asyncio.create_task(self.warm(phrases, voices), name="PhraseBankWarmup")
+
+    async def warm(self, phrases: Dict[str, str], voices: Iterable[str] = ()) -> int:
+        started = time.time()
+        voices = list(voices)
+        jobs = []
+        for name, text in phrases.items():
+            if not text:
+                continue
+            try:
+                phrase_voices = self._voices_for(text, voices)
+            except ValueError as e:
+                self.warm_errors += 1
+                logger.error(f"Phrase bank skipping '{name}': {e}")
+                continue
+            jobs.extend((name, text, voice) for voice in phrase_voices)
+        results = await asyncio.gather(
+            *(self._render(name, text, voice) for name, text, voice in jobs),
+            return_exceptions=True
+        )
+
+        rendered = 0
+        for (name, text, voice), result in zip(jobs, results):
+            if isinstance(result, Exception):
+                self.warm_errors += 1
+                logger.error(f"Phrase bank could not render '{name}' for {voice.speaker}: {result}")
+                continue
+            rendered += 1
+
+        self.warm_seconds = time.time() - started
+        logger.info(f"Phrase bank warmed {rendered}/{len(jobs)} phrases in {self.warm_seconds:.2f}s")
+        return rendered
+
+    def _voices_for(self, text: str, voices: Iterable[str]) -> List[VoiceParams]:
+        resolved = [self.tts_instance.resolve_voice_params(text)]
+        for spec in voices:
+            language, _, speaker = spec.partition(":")
+            if language != resolved[0].language:
+                continue
+            try:
+                voice = self.tts_instance.resolve_voice_params(text, language=language, speaker=speaker or None)
+            except ValueError as e:
+                logger.warning(f"Skipping phrase bank voice '{spec}': {e}")
+                continue
+            if voice not in resolved:
+                resolved.append(voice)
+        return resolved
+
+    async def _render(self, name: str, text: str, voice: VoiceParams) -> PhraseAudio:
+        key = make_cache_key(voice.voice_id, voice.model_id, voice.settings, text, voice.output_format)
+        source_path = await self.tts_instance._synthesize_to_file(text, voice=voice)
+        audio = await asyncio.to_thread(self._read, source_path)
+
+        suffix = os.path.splitext(source_path)[1]
+        path = os.path.join(self.audio_dir, f"{PHRASE_FILE_PREFIX}{key}{suffix}")
+        if not os.path.exists(path):
+            await asyncio.to_thread(self._write, path, audio)
+
+        entry = PhraseAudio(name, text, voice, path, audio)
+        with self.lock:
+            self.entries[key] = entry
+            self.names.setdefault(name, []).append(key)
+        return entry
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _write(path: str, audio: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.part"
+        with open(temp_path, "wb") as f:
+            f.write(audio)
+        os.replace(temp_path, path)
+
+    def get(self, voice: VoiceParams, text: str) -> Optional[PhraseAudio]:
+        if not self.entries:
+            return None
+        key = make_cache_key(voice.voice_id, voice.model_id, voice.settings, text, voice.output_format)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def lookup(self, text: str, language: Optional[str] = None, speaker: Optional[str] = None,
+               model_id: Optional[str] = None, audio_format: Optional[str] = None,
+               voice: Optional[VoiceParams] = None) -> Optional[PhraseAudio]:
+        if not self.entries:
+            return None
+        if voice is None:
+            try:
+                voice = self.tts_instance.resolve_voice_params(text, language=language, speaker=speaker,
+                                                               model_id=model_id, audio_format=audio_format)
+            except ValueError:
+                return None
+        return self.get(voice, text)
+
+    def get_phrase(self, name: str) -> Optional[PhraseAudio]:
+        with self.lock:
+            keys = self.names.get(name)
+            return self.entries.get(keys[0]) if keys else None
+
+    def get_pinned_files(self) -> List[str]:
+        with self.lock:
+            return [entry.path for entry in self.entries.values()]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "phrases": len(self.names),
+                "renditions": len(self.entries),
+                "bytes": sum(len(entry.audio) for entry in self.entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "warm_errors": self.warm_errors,
+                "warm_seconds": self.warm_seconds,
+                "warming": self.warm_task is not None and not self.warm_task.done(),
+            }
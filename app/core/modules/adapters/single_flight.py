@@ -0,0 +1,48 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    def __init__(self):
+        self.calls: Dict[Hashable, Future] = {}
+        self.followers: Dict[Future, int] = {}
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+        self.lock = threading.Lock()
+
+    def do(self, key: Hashable, submit: Callable[[], Future]) -> Tuple[Future, bool]:
+        with self.lock:
+            future = self.calls.get(key)
+            if future is not None and not future.done():
+                self.followers[future] = self.followers.get(future, 0) + 1
+                self.coalesced_calls += 1
+                return future, True
+
+            future = submit()
+            self.calls[key] = future
+            self.upstream_calls += 1
+
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future, False
+
+    def is_shared(self, future: Future) -> bool:
+        with self.lock:
+            return self.followers.get(future, 0) > 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            requests = self.upstream_calls + self.coalesced_calls
+            return {
+                "upstream_calls": self.upstream_calls,
+                "coalesced_calls": self.coalesced_calls,
+                "upstream_calls_saved": self.coalesced_calls,
+                "in_flight": len(self.calls),
+                "coalesce_ratio": (self.coalesced_calls / requests) if requests else 0.0,
+            }
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self.lock:
+            if self.calls.get(key) is future:
+                del self.calls[key]
+            self.followers.pop(future, None)
@@ -1,10 +1,6 @@
-import os
 import time
 import threading
 import queue
-import struct
-import math
-import tempfile
 from typing import Callable, Optional, List
 from groq import Groq
 try:
@@ -13,15 +9,15 @@ try:
 except Exception:
     pyaudio = None
     PYAUDIO_AVAILABLE = False
-import wave
 from dotenv import load_dotenv
 from app.Config import ENV_SETTINGS
-from .vad import VoiceActivityDetector
+from .vad import VoiceActivityDetector, DEFAULT_VOICE_THRESHOLD, create_voice_detector, has_sufficient_voice_content
+from .stt_providers import WHISPER_MODEL
+from .audio_buffers import UtteranceBuffer, encode_wav_frames, wav_pcm
+from .stt_workers import OrderedTranscriptionPool
 
 load_dotenv()
 
-WHISPER_MODEL = "whisper-large-v3-turbo"
-DEFAULT_VOICE_THRESHOLD = 0.02
 DEFAULT_VAD_THRESHOLD = 0.0015
 
 class RealTimeTranscriber:
@@ -39,6 +35,12 @@ class RealTimeTranscriber:
         self.audio_queue = queue.Queue()
         self.is_recording = False
         self.p = pyaudio.PyAudio() if PYAUDIO_AVAILABLE else None
+        self.transcription_pool = OrderedTranscriptionPool(
+            self._transcribe_wav,
+            self._deliver_transcription,
+            max_workers=ENV_SETTINGS.STT_MAX_WORKERS,
+            max_in_flight=ENV_SETTINGS.STT_MAX_IN_FLIGHT
+        )
         
     def start_recording(self):
         self.is_recording = True
@@ -64,6 +66,7 @@ class RealTimeTranscriber:
     def stop_recording(self):
         print("\nStopping transcription...")
         self.is_recording = False
+        self.transcription_pool.shutdown()
         if self.p:
             self.p.terminate()
         print("Transcription stopped.")
@@ -87,7 +90,7 @@ class RealTimeTranscriber:
                 data = stream.read(self.CHUNK, exception_on_overflow=False)
                 frames.append(data)
             if frames:
-                audio_data = b''.join(frames)
+                audio_data = encode_wav_frames(frames, self.RATE)
                 self.audio_queue.put(audio_data)
         stream.stop_stream()
         stream.close()
@@ -97,69 +100,32 @@ class RealTimeTranscriber:
         while self.is_recording:
             try:
                 audio_data = self.audio_queue.get(timeout=1)
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                    wf = wave.open(temp_file.name, 'wb')
-                    wf.setnchannels(self.CHANNELS)
-                    wf.setsampwidth(self.p.get_sample_size(self.FORMAT))
-                    wf.setframerate(self.RATE)
-                    wf.writeframes(audio_data)
-                    wf.close()
-                    
-                    try:
-                        with open(temp_file.name, "rb") as file:
-                            transcription = self.client.audio.transcriptions.create(
-                                file=(temp_file.name, file.read()),
-                                model=WHISPER_MODEL,
-                                response_format="json",
-                                temperature=ENV_SETTINGS.LLM_TEMPERATURE
-                            )
-                        
-                        if transcription.text.strip():
-                            timestamp = time.strftime("%H:%M:%S")
-                            print(f"[{timestamp}] {transcription.text}")
-                            
-                    except Exception as e:
-                        print(f"Transcription error: {e}")
-                    finally:
-                        os.unlink(temp_file.name)
-                
+                self.transcription_pool.submit(audio_data)
                 self.audio_queue.task_done()
             except queue.Empty:
                 continue
             except Exception as e:
                 print(f"Processing error: {e}")
     
+    def _deliver_transcription(self, sequence: int, transcription_text: Optional[str]) -> None:
+        if transcription_text:
+            timestamp = time.strftime("%H:%M:%S")
+            print(f"[{timestamp}] {transcription_text}")
+    
+    def get_transcription_stats(self) -> dict:
+        return self.transcription_pool.get_stats()
+    
+    def _transcribe_wav(self, wav: bytes) -> str:
+        transcription = self.client.audio.transcriptions.create(
+            file=("utterance.wav", wav),
+            model=WHISPER_MODEL,
+            response_format="json",
+            temperature=ENV_SETTINGS.LLM_TEMPERATURE
+        )
+        return transcription.text.strip()
+    
     def _has_sufficient_voice_content(self, audio_data: bytes) -> bool:
-        try:
-            chunk_size = 1024 * 2
-            voice_chunks = 0
-            total_chunks = 0
-            
-            for i in range(0, len(audio_data), chunk_size):
-                chunk = audio_data[i:i+chunk_size]
-                if len(chunk) < chunk_size:
-                    continue
-                    
-                try:
-                    audio_values = struct.unpack(f'{len(chunk)//2}h', chunk)
-                    rms = math.sqrt(sum(x*x for x in audio_values) / len(audio_values))
-                    normalized_rms = rms / 32768.0
-                    
-                    if normalized_rms > DEFAULT_VOICE_THRESHOLD:
-                        voice_chunks += 1
-                    total_chunks += 1
-                except:
-                    continue
-            
-            if total_chunks == 0:
-                return False
-                
-            voice_ratio = voice_chunks / total_chunks
-            return voice_ratio >= 0.3
-            
-        except Exception as e:
-            print(f"Voice content check error: {e}")
-            return True
+        return has_sufficient_voice_content(audio_data, DEFAULT_VOICE_THRESHOLD)
 
 
 class EnhancedRealTimeTranscriber(RealTimeTranscriber):
@@ -169,7 +135,7 @@ class EnhancedRealTimeTranscriber(RealTimeTranscriber):
         self.silence_threshold = 2.0
         self.last_transcription_time = time.time()
         self.voice_detector = VoiceActivityDetector()
-        self.accumulated_audio = []
+        self.accumulated_audio = UtteranceBuffer(self.RATE, pre_roll_seconds=ENV_SETTINGS.STT_PRE_ROLL_SECONDS)
         self.is_accumulating = False
         self.is_paused = False
         
@@ -214,17 +180,19 @@ class EnhancedRealTimeTranscriber(RealTimeTranscriber):
                     if not self.is_accumulating:
                         print("[Voice detected - recording...]")
                         self.is_accumulating = True
-                        self.accumulated_audio = []
+                        self.accumulated_audio.start()
                     self.accumulated_audio.append(data)
                 elif self.is_accumulating:
                     self.accumulated_audio.append(data)
                     
-                    if should_process and self.accumulated_audio:
+                    if should_process and len(self.accumulated_audio):
                         print("[Voice ended - processing...]")
-                        combined_audio = b''.join(self.accumulated_audio)
+                        combined_audio = self.accumulated_audio.to_wav()
                         self.audio_queue.put(combined_audio)
-                        self.accumulated_audio = []
+                        self.accumulated_audio.clear()
                         self.is_accumulating = False
+                else:
+                    self.accumulated_audio.push_pre_roll(data)
             else:
                 frames = [data]
                 for _ in range(1, int(self.RATE / self.CHUNK * self.RECORD_SECONDS)):
@@ -233,7 +201,7 @@ class EnhancedRealTimeTranscriber(RealTimeTranscriber):
                     frames.append(stream.read(self.CHUNK, exception_on_overflow=False))
                 
                 if frames:
-                    audio_data = b''.join(frames)
+                    audio_data = encode_wav_frames(frames, self.RATE)
                     self.audio_queue.put(audio_data)
         
         print(f'stopping the stream of voice.')
@@ -254,57 +222,37 @@ class EnhancedRealTimeTranscriber(RealTimeTranscriber):
                     continue
                 
                 audio_data = self.audio_queue.get(timeout=1)
+                pcm = wav_pcm(audio_data)
                 
-                if len(audio_data) < self.RATE * 2:
+                if len(pcm) < self.RATE * 2:
                     self.audio_queue.task_done()
                     continue
                 
-                if not self._has_sufficient_voice_content(audio_data):
+                if not self._has_sufficient_voice_content(pcm):
                     self.audio_queue.task_done()
                     continue
                 
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                    wf = wave.open(temp_file.name, 'wb')
-                    wf.setnchannels(self.CHANNELS)
-                    wf.setsampwidth(self.p.get_sample_size(self.FORMAT))
-                    wf.setframerate(self.RATE)
-                    wf.writeframes(audio_data)
-                    wf.close()
-                    
-                    try:
-                        with open(temp_file.name, "rb") as file:
-                            transcription = self.client.audio.transcriptions.create(
-                                file=(temp_file.name, file.read()),
-                                model=WHISPER_MODEL,
-                                response_format="json",
-                                temperature=ENV_SETTINGS.LLM_TEMPERATURE
-                            )
-                        
-                        if transcription.text.strip() and not self.is_paused:
-                            timestamp = time.strftime("%H:%M:%S")
-                            transcription_text = transcription.text.strip()
-                            print(f"[{timestamp}] {transcription_text}")
-                            print(f'\transcription_text : {transcription_text}')
-
-                            for callback in self.transcription_callbacks:
-                                try:
-                                    callback(transcription_text)
-                                except Exception as e:
-                                    print(f"Error in transcription callback: {e}")
-                            
-                            self.last_transcription_time = time.time()
-                            
-                    except Exception as e:
-                        print(f"Transcription error: {e}")
-                    finally:
-                        os.unlink(temp_file.name)
-                
+                self.transcription_pool.submit(audio_data)
                 self.audio_queue.task_done()
             except queue.Empty:
                 continue
             except Exception as e:
                 print(f"Processing error: {e}")
     
+    def _deliver_transcription(self, sequence: int, transcription_text: Optional[str]) -> None:
+        if transcription_text and not self.is_paused:
+            timestamp = time.strftime("%H:%M:%S")
+            print(f"[{timestamp}] {transcription_text}")
+            print(f'\transcription_text : {transcription_text}')
+
+            for callback in self.transcription_callbacks:
+                try:
+                    callback(transcription_text)
+                except Exception as e:
+                    print(f"Error in transcription callback: {e}")
+            
+            self.last_transcription_time = time.time()
+    
     def start_recording_with_callback(self, callback: Callable[[str], None]) -> None:
         self.add_transcription_callback(callback)
         self.start_recording()
@@ -312,8 +260,11 @@ class EnhancedRealTimeTranscriber(RealTimeTranscriber):
     def get_silence_duration(self) -> float:
         return time.time() - self.last_transcription_time
     
-    def enable_voice_activity_detection(self, threshold: float = DEFAULT_VAD_THRESHOLD, min_duration: float = 1.0, silence_duration: float = 1.5) -> None:
-        self.voice_detector = VoiceActivityDetector(threshold, min_duration, silence_duration)
+    def enable_voice_activity_detection(self, threshold: Optional[float] = None, min_duration: float = 1.0, silence_duration: float = 1.5,
+                                        detector: str = VoiceActivityDetector.name) -> None:
+        if threshold is None and detector == VoiceActivityDetector.name:
+            threshold = DEFAULT_VAD_THRESHOLD
+        self.voice_detector = create_voice_detector(detector, threshold, min_duration, silence_duration)
     
     def disable_voice_activity_detection(self) -> None:
         self.voice_detector = None
@@ -0,0 +1,85 @@
+import asyncio
+from typing import List, Optional, Protocol, runtime_checkable
+from groq import Groq
+
+from app.Config import ENV_SETTINGS
+from .audio_buffers import encode_wav
+
+WHISPER_MODEL = "whisper-large-v3-turbo"
+STT_SAMPLE_RATE = 16000
+STT_SAMPLE_WIDTH = 2
+STT_CHANNELS = 1
+
+FAKE_TRANSCRIPTION_DELAY = 0.05
+
+
+@runtime_checkable
+class STTBackend(Protocol):
+    name: str
+    model_id: str
+
+    async def transcribe(self, pcm: bytes, sample_rate: int = STT_SAMPLE_RATE) -> str: ...
+
+    async def aclose(self) -> None: ...
+
+
+class GroqWhisperProvider:
+    name = "groq"
+    model_id = WHISPER_MODEL
+
+    def __init__(self, api_key=None, model_id=None):
+        self.api_key = api_key or ENV_SETTINGS.GROQ_API_KEY
+        if not self.api_key:
+            raise ValueError("GROQ_API_KEY must be provided or set as environment variable")
+        self.model_id = model_id or WHISPER_MODEL
+        self.client = Groq(api_key=self.api_key)
+
+    def transcribe_wav(self, wav):
+        transcription = self.client.audio.transcriptions.create(
+            file=("utterance.wav", wav),
+            model=self.model_id,
+            response_format="json",
+            temperature=ENV_SETTINGS.LLM_TEMPERATURE
+        )
+        return transcription.text.strip()
+
+    async def transcribe(self, pcm, sample_rate=STT_SAMPLE_RATE):
+        return await asyncio.to_thread(self.transcribe_wav, encode_wav(pcm, sample_rate))
+
+    async def aclose(self):
+        self.client.close()
+
+
+class FakeSTTProvider:
+    name = "fake"
+    model_id = "fake-transcript-v1"
+
+    def __init__(self, transcripts: Optional[List[str]] = None, delay=FAKE_TRANSCRIPTION_DELAY):
+        self.transcripts = list(transcripts or [])
+        self.delay = delay
+        self.calls = 0
+
+    async def transcribe(self, pcm, sample_rate=STT_SAMPLE_RATE):
+        await asyncio.sleep(self.delay)
+        index = self.calls
+        self.calls += 1
+        if index < len(self.transcripts):
+            return self.transcripts[index]
+        seconds = len(pcm) / (STT_SAMPLE_WIDTH * sample_rate)
+        return f"utterance {index + 1} ({seconds:.2f}s)"
+
+    async def aclose(self):
+        pass
+
+
+STT_PROVIDERS = {
+    GroqWhisperProvider.name: GroqWhisperProvider,
+    FakeSTTProvider.name: FakeSTTProvider,
+}
+
+
+def create_stt_provider(name=None):
+    name = (name or ENV_SETTINGS.STT_PROVIDER or GroqWhisperProvider.name).lower()
+    if name not in STT_PROVIDERS:
+        raise ValueError(f"Unknown STT provider '{name}'. Available: {', '.join(STT_PROVIDERS)}")
+    return STT_PROVIDERS[name]()
@@ -0,0 +1,291 @@
+import asyncio
+import logging
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+try:
+    import opuslib
+    OPUS_AVAILABLE = True
+except Exception:
+    opuslib = None
+    OPUS_AVAILABLE = False
+
+from .audio_buffers import DEFAULT_PRE_ROLL_SECONDS, UtteranceBuffer
+from .stt_providers import STT_SAMPLE_RATE, STT_SAMPLE_WIDTH
+from .stt_workers import DEFAULT_STT_MAX_IN_FLIGHT
+from .vad import VoiceActivityDetector, VoiceDetector, DEFAULT_VOICE_THRESHOLD, has_sufficient_voice_content
+
+logger = logging.getLogger(__name__)
+
+PCM_ENCODING = "pcm16"
+OPUS_ENCODING = "opus"
+STREAM_ENCODINGS = (PCM_ENCODING, OPUS_ENCODING)
+
+DEFAULT_FRAME_SAMPLES = 1024
+DEFAULT_MIN_UTTERANCE_SECONDS = 1.0
+DEFAULT_MAX_UTTERANCE_SECONDS = 30.0
+OPUS_MAX_FRAME_SAMPLES = STT_SAMPLE_RATE * 120 // 1000
+DEFAULT_INTERIM_INTERVAL_SECONDS = 1.0
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def transcript_words(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text.lower())
+
+
+def stable_prefix(previous: str, current: str) -> str:
+    tokens = current.split()
+    agreed = 0
+    for before, after in zip(previous.split(), tokens):
+        if transcript_words(before) != transcript_words(after):
+            break
+        agreed += 1
+    return " ".join(tokens[:agreed])
+
+
+@dataclass
+class TranscriptHypothesis:
+    sequence: int
+    text: str
+    audio_seconds: float
+    final: bool
+    stable_text: str = ""
+
+
+class OpusFrameDecoder:
+    def __init__(self, sample_rate: int = STT_SAMPLE_RATE):
+        if not OPUS_AVAILABLE:
+            raise RuntimeError("opuslib is not available in this environment. Send pcm16 frames instead.")
+        self.decoder = opuslib.Decoder(sample_rate, 1)
+
+    def decode(self, frame: bytes) -> bytes:
+        return self.decoder.decode(frame, OPUS_MAX_FRAME_SAMPLES)
+
+
+class StreamingTranscriber:
+    def __init__(self, provider, encoding: str = PCM_ENCODING, sample_rate: int = STT_SAMPLE_RATE,
+                 frame_samples: int = DEFAULT_FRAME_SAMPLES, detector: Optional[VoiceDetector] = None,
+                 min_utterance_seconds: float = DEFAULT_MIN_UTTERANCE_SECONDS,
+                 max_utterance_seconds: float = DEFAULT_MAX_UTTERANCE_SECONDS,
+                 voice_threshold: float = DEFAULT_VOICE_THRESHOLD,
+                 pre_roll_seconds: float = DEFAULT_PRE_ROLL_SECONDS,
+                 max_in_flight: int = DEFAULT_STT_MAX_IN_FLIGHT,
+                 interim_interval_seconds: Optional[float] = DEFAULT_INTERIM_INTERVAL_SECONDS):
+        if encoding not in STREAM_ENCODINGS:
+            raise ValueError(f"Unsupported audio encoding '{encoding}'. Available: {', '.join(STREAM_ENCODINGS)}")
+        self.provider = provider
+        self.encoding = encoding
+        self.sample_rate = sample_rate
+        self.frame_samples = frame_samples
+        self.frame_bytes = frame_samples * STT_SAMPLE_WIDTH
+        self.frame_seconds = frame_samples / sample_rate
+        self.detector = detector or VoiceActivityDetector()
+        self.min_utterance_bytes = int(min_utterance_seconds * sample_rate) * STT_SAMPLE_WIDTH
+        self.max_utterance_bytes = int(max_utterance_seconds * sample_rate) * STT_SAMPLE_WIDTH
+        self.voice_threshold = voice_threshold
+        self.max_in_flight = max(1, max_in_flight or DEFAULT_STT_MAX_IN_FLIGHT)
+        self.interim_interval_bytes = int((interim_interval_seconds or 0) * sample_rate) * STT_SAMPLE_WIDTH
+        self.opus_decoder = OpusFrameDecoder(sample_rate) if encoding == OPUS_ENCODING else None
+
+        self.pending = bytearray()
+        self.accumulated_audio = UtteranceBuffer(sample_rate, pre_roll_seconds=pre_roll_seconds)
+        self.is_accumulating = False
+        self.next_interim_bytes = 0
+        self.interim_pending = False
+        self.audio_seconds = 0.0
+        self.last_voice_seconds = 0.0
+        self.utterances: asyncio.Queue = asyncio.Queue()
+        self.sequence = 0
+        self.in_flight = 0
+        self.stats = {"frames": 0, "utterances": 0, "transcribed": 0, "skipped": 0, "errors": 0,
+                      "peak_in_flight": 0, "interims": 0, "interims_dropped": 0, "interim_errors": 0,
+                      "audio_seconds": 0.0, "transcribed_seconds": 0.0}
+        self.lock = threading.Lock()
+
+    def feed(self, data: bytes) -> List[str]:
+        if self.opus_decoder is not None:
+            data = self.opus_decoder.decode(data)
+        self.pending.extend(data)
+
+        frame_count = len(self.pending) // self.frame_bytes
+        if not frame_count:
+            return []
+        timestamps = [self.audio_seconds + (index + 1) * self.frame_seconds for index in range(frame_count)]
+        with memoryview(self.pending) as view:
+            decisions = self.detector.detect_voice_activity_batch(
+                view[:frame_count * self.frame_bytes], self.frame_samples, timestamps
+            )
+
+        events = []
+        with memoryview(self.pending) as view:
+            for index, (has_voice, should_process) in enumerate(decisions):
+                offset = index * self.frame_bytes
+                event = self._process_frame(view[offset:offset + self.frame_bytes], has_voice, should_process,
+                                            timestamps[index])
+                if event:
+                    events.append(event)
+        del self.pending[:frame_count * self.frame_bytes]
+        self.audio_seconds = timestamps[-1]
+        self.stats["frames"] += frame_count
+        return events
+
+    def _process_frame(self, frame: memoryview, has_voice: bool, should_process: bool, timestamp: float) -> Optional[str]:
+        if has_voice:
+            self.last_voice_seconds = timestamp
+            started = not self.is_accumulating
+            if started:
+                self.is_accumulating = True
+                self.sequence += 1
+                self.accumulated_audio.start()
+                self.next_interim_bytes = self.min_utterance_bytes
+            self.accumulated_audio.append(frame)
+            if len(self.accumulated_audio) >= self.max_utterance_bytes:
+                return self._end_utterance()
+            self._queue_interim()
+            return "speech_start" if started else None
+
+        if self.is_accumulating:
+            self.accumulated_audio.append(frame)
+            if should_process or timestamp - self.last_voice_seconds > self.detector.silence_duration:
+                return self._end_utterance(keep=should_process)
+            self._queue_interim()
+        else:
+            self.accumulated_audio.push_pre_roll(frame)
+        return None
+
+    def _queue_interim(self) -> None:
+        if not self.interim_interval_bytes or self.interim_pending:
+            return
+        size = len(self.accumulated_audio)
+        if size < self.next_interim_bytes:
+            return
+        self.interim_pending = True
+        self.next_interim_bytes = size + self.interim_interval_bytes
+        self.utterances.put_nowait((self.sequence, self.accumulated_audio.to_pcm(), False))
+
+    def _end_utterance(self, keep: bool = True) -> str:
+        kept = keep and bool(len(self.accumulated_audio))
+        if kept:
+            self.utterances.put_nowait((self.sequence, self.accumulated_audio.to_pcm(), True))
+        self.accumulated_audio.clear()
+        self.is_accumulating = False
+        return "speech_end" if kept else "speech_discarded"
+
+    def flush(self) -> None:
+        if self.is_accumulating:
+            self._end_utterance()
+        self.detector.reset()
+
+    def close(self) -> None:
+        self.flush()
+        self.utterances.put_nowait(None)
+
+    async def transcripts(self) -> AsyncIterator[TranscriptHypothesis]:
+        in_flight: Deque[Tuple[int, float, bool, asyncio.Task]] = deque()
+        hypothesis: Tuple[int, str, str] = (0, "", "")
+        getter: Optional[asyncio.Task] = None
+        closed = False
+        try:
+            while in_flight or not closed:
+                if not closed and getter is None and len(in_flight) < self.max_in_flight:
+                    getter = asyncio.ensure_future(self.utterances.get())
+                waiting = {task for task in (getter, in_flight[0][3] if in_flight else None) if task is not None}
+                await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+                if getter is not None and getter.done():
+                    item, getter = getter.result(), None
+                    if item is None:
+                        closed = True
+                    elif not item[2] and (item[0] != self.sequence or not self.is_accumulating):
+                        self.interim_pending = False
+                        with self.lock:
+                            self.stats["interims_dropped"] += 1
+                    else:
+                        sequence, audio_data, final = item
+                        transcribe = self.transcribe if final else self.transcribe_interim
+                        in_flight.append((sequence, len(audio_data) / (STT_SAMPLE_WIDTH * self.sample_rate), final,
+                                          asyncio.ensure_future(transcribe(sequence, audio_data))))
+                        self._track_in_flight(len(in_flight))
+
+                while in_flight and in_flight[0][3].done():
+                    sequence, seconds, final, task = in_flight.popleft()
+                    self._track_in_flight(len(in_flight))
+                    text = task.result()
+                    if final:
+                        if text:
+                            yield TranscriptHypothesis(sequence, text, seconds, True, text)
+                        continue
+
+                    self.interim_pending = False
+                    if not text:
+                        continue
+                    previous, stable = hypothesis[1:] if hypothesis[0] == sequence else ("", "")
+                    agreed = stable_prefix(previous, text)
+                    if len(agreed) > len(stable):
+                        stable = agreed
+                    hypothesis = (sequence, text, stable)
+                    yield TranscriptHypothesis(sequence, text, seconds, False, stable)
+        finally:
+            if getter is not None:
+                getter.cancel()
+            for _, _, _, task in in_flight:
+                task.cancel()
+
+    def _track_in_flight(self, count: int) -> None:
+        with self.lock:
+            self.in_flight = count
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], count)
+
+    async def transcribe(self, sequence: int, audio_data: bytes) -> str:
+        seconds = len(audio_data) / (STT_SAMPLE_WIDTH * self.sample_rate)
+        with self.lock:
+            self.stats["utterances"] += 1
+            self.stats["audio_seconds"] += seconds
+
+        if len(audio_data) < self.min_utterance_bytes or not has_sufficient_voice_content(audio_data, self.voice_threshold):
+            with self.lock:
+                self.stats["skipped"] += 1
+            return ""
+
+        try:
+            text = await self.provider.transcribe(audio_data, self.sample_rate)
+        except Exception as e:
+            logger.error(f"Utterance {sequence} transcription failed: {e}")
+            with self.lock:
+                self.stats["errors"] += 1
+            return ""
+
+        with self.lock:
+            self.stats["transcribed"] += 1
+            self.stats["transcribed_seconds"] += seconds
+        return text.strip()
+
+    async def transcribe_interim(self, sequence: int, audio_data: bytes) -> str:
+        if not has_sufficient_voice_content(audio_data, self.voice_threshold):
+            return ""
+        try:
+            text = await self.provider.transcribe(audio_data, self.sample_rate)
+        except Exception as e:
+            logger.warning(f"Interim transcription for utterance {sequence} failed: {e}")
+            with self.lock:
+                self.stats["interim_errors"] += 1
+            return ""
+
+        with self.lock:
+            self.stats["interims"] += 1
+        return text.strip()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "provider": self.provider.name,
+                "encoding": self.encoding,
+                "stream_seconds": self.audio_seconds,
+                "pending_utterances": self.utterances.qsize(),
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                **self.stats,
+            }
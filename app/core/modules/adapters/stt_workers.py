@@ -0,0 +1,96 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_STT_WORKERS = 3
+DEFAULT_STT_MAX_IN_FLIGHT = 6
+WINDOW_POLL_SECONDS = 0.5
+
+
+class OrderedTranscriptionPool:
+    def __init__(self, transcribe: Callable[[bytes], str], deliver: Callable[[int, Optional[str]], None],
+                 max_workers: int = DEFAULT_STT_WORKERS, max_in_flight: int = DEFAULT_STT_MAX_IN_FLIGHT,
+                 thread_name_prefix: str = "STT-Worker"):
+        self.transcribe = transcribe
+        self.deliver = deliver
+        self.max_workers = max(1, max_workers or DEFAULT_STT_WORKERS)
+        self.max_in_flight = max(self.max_workers, max_in_flight or DEFAULT_STT_MAX_IN_FLIGHT)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=thread_name_prefix)
+        self.window = threading.BoundedSemaphore(self.max_in_flight)
+        self.lock = threading.Lock()
+        self.delivery_lock = threading.Lock()
+        self.sequence = 0
+        self.next_delivery = 1
+        self.completed: Dict[int, Optional[str]] = {}
+        self.in_flight = 0
+        self.closed = False
+        self.stats = {"submitted": 0, "transcribed": 0, "delivered": 0, "errors": 0, "reordered": 0,
+                      "peak_in_flight": 0, "window_wait_seconds": 0.0, "transcribe_seconds": 0.0}
+
+    def submit(self, audio_data: bytes) -> Optional[int]:
+        started = time.monotonic()
+        while not self.window.acquire(timeout=WINDOW_POLL_SECONDS):
+            if self.closed:
+                return None
+        if self.closed:
+            self.window.release()
+            return None
+
+        with self.lock:
+            self.sequence += 1
+            sequence = self.sequence
+            self.in_flight += 1
+            self.stats["submitted"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.in_flight)
+            self.stats["window_wait_seconds"] += time.monotonic() - started
+        self.executor.submit(self._run, sequence, audio_data)
+        return sequence
+
+    def _run(self, sequence: int, audio_data: bytes) -> None:
+        started = time.monotonic()
+        try:
+            text = self.transcribe(audio_data)
+        except Exception as e:
+            print(f"Transcription error: {e}")
+            text = None
+
+        with self.lock:
+            self.stats["transcribed" if text is not None else "errors"] += 1
+            self.stats["transcribe_seconds"] += time.monotonic() - started
+            if sequence != self.next_delivery:
+                self.stats["reordered"] += 1
+            self.completed[sequence] = text
+        self._drain()
+
+    def _drain(self) -> None:
+        with self.delivery_lock:
+            while True:
+                with self.lock:
+                    if self.next_delivery not in self.completed:
+                        return
+                    sequence = self.next_delivery
+                    text = self.completed.pop(sequence)
+                    self.next_delivery += 1
+                try:
+                    self.deliver(sequence, text)
+                except Exception as e:
+                    print(f"Error delivering transcription {sequence}: {e}")
+                with self.lock:
+                    self.in_flight -= 1
+                    self.stats["delivered"] += 1
+                self.window.release()
+
+    def shutdown(self, wait: bool = False) -> None:
+        self.closed = True
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self.in_flight,
+                "awaiting_order": len(self.completed),
+                **self.stats,
+            }
@@ -0,0 +1,153 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TASK_TTL_SECONDS = 300.0
+DEFAULT_MAX_TASK_ENTRIES = 10000
+
+_MISSING = object()
+
+
+class TaskRecord:
+    __slots__ = ("value", "expires_at")
+
+    def __init__(self, value: Any, expires_at: float):
+        self.value = value
+        self.expires_at = expires_at
+
+
+class TaskRegistry:
+    def __init__(self, ttl_seconds: float = DEFAULT_TASK_TTL_SECONDS, max_entries: int = DEFAULT_MAX_TASK_ENTRIES,
+                 on_discard: Optional[Callable[[Any], None]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.on_discard = on_discard
+        self.records: "OrderedDict[Hashable, TaskRecord]" = OrderedDict()
+        self.expired = 0
+        self.evicted = 0
+        self.lock = threading.Lock()
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        now = time.monotonic()
+        with self.lock:
+            record = self.records.get(key)
+            if record is None:
+                self.records[key] = TaskRecord(value, now + self.ttl_seconds)
+                discarded = []
+            else:
+                discarded = [record.value] if record.value is not value else []
+                record.value = value
+                record.expires_at = now + self.ttl_seconds
+                self.records.move_to_end(key)
+            discarded.extend(self._purge(now))
+        self._discard(discarded)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self.lock:
+            del self.records[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self.lock:
+            discarded = self._purge(time.monotonic())
+            count = len(self.records)
+        self._discard(discarded)
+        return count
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self.keys())
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self.lock:
+            record = self.records.get(key)
+            if record is None:
+                return default
+            if record.expires_at > now:
+                return record.value
+            del self.records[key]
+            self.expired += 1
+        self._discard([record.value])
+        return default
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self.lock:
+            record = self.records.pop(key, None)
+        if record is None:
+            return default
+        if record.expires_at <= now:
+            self._discard([record.value])
+            return default
+        return record.value
+
+    def keys(self) -> List[Hashable]:
+        return [key for key, _ in self.items()]
+
+    def values(self) -> List[Any]:
+        return [value for _, value in self.items()]
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        with self.lock:
+            discarded = self._purge(time.monotonic())
+            items = [(key, record.value) for key, record in self.records.items()]
+        self._discard(discarded)
+        return items
+
+    def clear(self) -> None:
+        with self.lock:
+            self.records.clear()
+
+    def purge_expired(self) -> int:
+        with self.lock:
+            discarded = self._purge(time.monotonic())
+        self._discard(discarded)
+        return len(discarded)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "entries": len(self.records),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+    def _purge(self, now: float) -> List[Any]:
+        records = self.records
+        discarded = []
+        while records:
+            key, record = next(iter(records.items()))
+            if record.expires_at > now:
+                break
+            records.popitem(last=False)
+            discarded.append(record.value)
+            self.expired += 1
+
+        while len(records) > self.max_entries:
+            _, record = records.popitem(last=False)
+            discarded.append(record.value)
+            self.evicted += 1
+        return discarded
+
+    def _discard(self, values: List[Any]) -> None:
+        if self.on_discard is None:
+            return
+        for value in values:
+            try:
+                self.on_discard(value)
+            except Exception as e:
+                logger.error(f"Task registry discard callback failed: {e}")
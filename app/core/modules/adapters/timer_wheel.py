@@ -0,0 +1,121 @@
+import math
+import time
+import logging
+import threading
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TICK_SECONDS = 0.05
+DEFAULT_WHEEL_SIZE = 512
+
+
+class Timer:
+    __slots__ = ("timer_id", "target_tick", "callback", "args")
+
+    def __init__(self, timer_id: int, target_tick: int, callback: Callable[..., Any], args: tuple):
+        self.timer_id = timer_id
+        self.target_tick = target_tick
+        self.callback = callback
+        self.args = args
+
+
+class TimerWheel:
+    def __init__(self, tick_seconds: float = DEFAULT_TICK_SECONDS, wheel_size: int = DEFAULT_WHEEL_SIZE,
+                 name: str = "TTS-TimerWheel"):
+        self.tick_seconds = tick_seconds
+        self.wheel_size = wheel_size
+        self.name = name
+        self.slots: List[Dict[int, Timer]] = [{} for _ in range(wheel_size)]
+        self.timers: Dict[int, Timer] = {}
+        self.ids = count(1)
+        self.current_tick = 0
+        self.started_at = time.monotonic()
+        self.scheduled = 0
+        self.fired = 0
+        self.cancelled = 0
+        self.errors = 0
+        self.max_lag = 0.0
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+
+    def schedule(self, delay: float, callback: Callable[..., Any], *args: Any) -> int:
+        with self.lock:
+            self._ensure_running()
+            elapsed_ticks = (time.monotonic() - self.started_at) / self.tick_seconds
+            target_tick = max(self.current_tick + 1, math.ceil(elapsed_ticks + delay / self.tick_seconds))
+            timer = Timer(next(self.ids), target_tick, callback, args)
+            self.slots[target_tick % self.wheel_size][timer.timer_id] = timer
+            self.timers[timer.timer_id] = timer
+            self.scheduled += 1
+            return timer.timer_id
+
+    def cancel(self, timer_id: Optional[int]) -> bool:
+        with self.lock:
+            timer = self.timers.pop(timer_id, None)
+            if timer is None:
+                return False
+            del self.slots[timer.target_tick % self.wheel_size][timer_id]
+            self.cancelled += 1
+            return True
+
+    def _ensure_running(self) -> None:
+        if self.thread is None or not self.thread.is_alive():
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+            self.thread.start()
+
+    def _run(self) -> None:
+        while not self.stop_event.is_set():
+            next_tick_at = self.started_at + (self.current_tick + 1) * self.tick_seconds
+            if self.stop_event.wait(max(0.0, next_tick_at - time.monotonic())):
+                break
+            for timer in self._advance():
+                try:
+                    timer.callback(*timer.args)
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Timer callback {getattr(timer.callback, '__name__', timer.callback)} failed: {e}")
+
+    def _advance(self) -> List[Timer]:
+        now_tick = int((time.monotonic() - self.started_at) / self.tick_seconds)
+        due = []
+        with self.lock:
+            while self.current_tick < now_tick:
+                self.current_tick += 1
+                slot = self.slots[self.current_tick % self.wheel_size]
+                ready = [timer for timer in slot.values() if timer.target_tick <= self.current_tick]
+                for timer in ready:
+                    del slot[timer.timer_id]
+                    del self.timers[timer.timer_id]
+                due.extend(ready)
+            self.fired += len(due)
+            if due:
+                self.max_lag = max(self.max_lag, (now_tick - due[0].target_tick) * self.tick_seconds)
+        return due
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5.0)
+        with self.lock:
+            for slot in self.slots:
+                slot.clear()
+            self.timers.clear()
+            self.thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "tick_seconds": self.tick_seconds,
+                "pending": len(self.timers),
+                "scheduled": self.scheduled,
+                "fired": self.fired,
+                "cancelled": self.cancelled,
+                "errors": self.errors,
+                "max_lag_seconds": self.max_lag,
+                "threads": 1 if self.thread is not None and self.thread.is_alive() else 0,
+                "process_threads": threading.active_count(),
+            }
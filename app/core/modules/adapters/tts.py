@@ -11,13 +11,25 @@ except Exception:
     PYAUDIO_AVAILABLE = False
 import wave
 import asyncio
-import requests
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED, CancelledError
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from pathlib import Path
 from dotenv import load_dotenv
 from app.Config import ENV_SETTINGS
-from .tts_utils import LANGUAGE_DICT, DEFAULT_SPEAKERS, detect_language
+from .tts_utils import DEFAULT_SPEAKERS, VoiceParams, detect_language
+from .tts_cache import TTSAudioCache, make_cache_key
+from .audio_formats import get_audio_format
+from .audio_tee import AudioTeeWriter
+from .tts_providers import create_tts_provider, DEFAULT_STREAM_CHUNK_SIZE
+from .single_flight import SingleFlight
+from .phrase_bank import PhraseBank
+from .task_registry import TaskRegistry
+from .tts_hedging import HedgedCaller
+from .timer_wheel import TimerWheel
+from .tts_metrics import (TTSStageMetrics, STAGE_LANGUAGE_DETECTION, STAGE_UPSTREAM_TTFB, STAGE_UPSTREAM_TOTAL,
+                          STAGE_DISK_WRITE)
 
 load_dotenv()
 
@@ -26,10 +38,14 @@ DEFAULT_SPEAKER = "Swara"
 DEFAULT_CHUNK_SIZE = 4096
 DEFAULT_MAX_WORKERS = 3
 DEFAULT_TTS_TIMEOUT = 30.0
-TASK_CLEANUP_AGE_SECONDS = 300
+AUDIO_OUTPUT_DIR = "static/audio"
+DEFAULT_VOICE_SETTINGS = {"stability": 0.5, "similarity_boost": 0.5}
+PLAYBACK_CALLBACK_DELAY = 0.3
+
+_MISSING = object()
 
 class RealTimeTTS:
-    def __init__(self, api_key=None, language=DEFAULT_LANGUAGE, speaker=DEFAULT_SPEAKER, max_workers=DEFAULT_MAX_WORKERS):
+    def __init__(self, api_key=None, language=DEFAULT_LANGUAGE, speaker=DEFAULT_SPEAKER, max_workers=DEFAULT_MAX_WORKERS, audio_cache=None, provider=None, timer_wheel=None):
         self.language = language
         self.speaker = speaker
         self.CHUNK = DEFAULT_CHUNK_SIZE
@@ -48,13 +64,94 @@ class RealTimeTTS:
         
         # Enhanced tracking
         self.task_counter = 0
-        self.task_results = {}
+        self.task_results = self._create_task_registry()
         self.task_completion_callbacks = {}
         self.result_lock = threading.RLock()
-        self.pending_tasks = {}
-        
+        self.pending_tasks = self._create_task_registry()
+        self.task_futures = self._create_task_registry()
+        self.single_flight = SingleFlight()
+        self.owns_timer_wheel = timer_wheel is None
+        self.timer_wheel = timer_wheel or TimerWheel()
+        self.metrics = TTSStageMetrics()
+        
+        if audio_cache is None and ENV_SETTINGS.TTS_CACHE_ENABLED:
+            audio_cache = TTSAudioCache(
+                cache_dir=AUDIO_OUTPUT_DIR,
+                max_bytes=ENV_SETTINGS.TTS_CACHE_MAX_BYTES,
+                max_entries=ENV_SETTINGS.TTS_CACHE_MAX_ENTRIES,
+                timer_wheel=self.timer_wheel
+            )
+        self.audio_cache = audio_cache
+        self.provider = provider or create_tts_provider()
+        self.backends = {self.provider.name: self.provider}
+        self.backend_lock = threading.Lock()
+        self.phrase_bank = PhraseBank(self, AUDIO_OUTPUT_DIR)
+        self.hedger = None
+        if ENV_SETTINGS.TTS_HEDGE_ENABLED:
+            self.hedger = HedgedCaller(
+                percentile=ENV_SETTINGS.TTS_HEDGE_PERCENTILE,
+                min_samples=ENV_SETTINGS.TTS_HEDGE_MIN_SAMPLES,
+                window_size=ENV_SETTINGS.TTS_HEDGE_WINDOW_SIZE,
+                max_rate=ENV_SETTINGS.TTS_HEDGE_MAX_RATE,
+                budget_window_seconds=ENV_SETTINGS.TTS_HEDGE_BUDGET_WINDOW_SECONDS
+            )
+        
+        self.loop = None
+        self.loop_thread = None
+        self.owns_loop = False
+        self.loop_lock = threading.Lock()
+        
+    def _create_task_registry(self):
+        return TaskRegistry(ENV_SETTINGS.TASK_REGISTRY_TTL_SECONDS, ENV_SETTINGS.TASK_REGISTRY_MAX_ENTRIES)
+    
+    def get_backend(self, name=None):
+        if not name:
+            return self.provider
+        with self.backend_lock:
+            backend = self.backends.get(name)
+            if backend is None:
+                backend = create_tts_provider(name)
+                self.backends[name] = backend
+            return backend
+    
+    def backend_name_for(self, language, speaker):
+        voice_backends = ENV_SETTINGS.TTS_VOICE_BACKENDS or {}
+        return voice_backends.get(f"{language}:{speaker}") or voice_backends.get(language) or self.provider.name
+    
+    def get_voices(self):
+        voices = {}
+        for language in DEFAULT_SPEAKERS:
+            for speaker in self.get_backend(self.backend_name_for(language, None)).voices().get(language, {}):
+                voices.setdefault(language, {})[speaker] = self.backend_name_for(language, speaker)
+        return voices
+    
     def detect_language(self, text):
         return detect_language(text)
+    
+    def bind_event_loop(self, loop):
+        with self.loop_lock:
+            self.loop = loop
+            self.owns_loop = False
+    
+    def _get_event_loop(self):
+        with self.loop_lock:
+            if self.loop is None or self.loop.is_closed():
+                self.loop = asyncio.new_event_loop()
+                self.loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True, name="TTS-EventLoop")
+                self.loop_thread.start()
+                self.owns_loop = True
+            return self.loop
+    
+    def _run_coroutine(self, coro, timeout=None):
+        loop = self._get_event_loop()
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            coro.close()
+            raise RuntimeError("Blocking TTS call made from the TTS event loop; await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
         
     def set_playback_finished_callback(self, callback):
         self.playback_finished_callback = callback
@@ -74,87 +171,220 @@ class RealTimeTTS:
     def convert_text_with_language(self, text, language=None, speaker=None):
         self.ensure_tts_ready()
         
-        if language and speaker:
-            original_auto_detect = self.auto_detect_language
-            original_language = self.language
-            original_speaker = self.speaker
-            
-            self.auto_detect_language = False
-            self.language = language
-            self.speaker = speaker
-            
-            try:
-                future = self.executor.submit(self._process_single_text, text)
-                result = future.result(timeout=30)
-                audio_file_path = result
-            except Exception as e:
-                print(f"Error in convert_text_with_language: {e}")
-                audio_file_path = None
-            
-            self.auto_detect_language = original_auto_detect
-            self.language = original_language
-            self.speaker = original_speaker
-            
-            return audio_file_path
+        try:
+            voice = self.resolve_voice_params(text, language=language, speaker=speaker)
+            future = self.executor.submit(self._process_single_text, text, voice)
+            return future.result(timeout=DEFAULT_TTS_TIMEOUT)
+        except Exception as e:
+            print(f"Error in convert_text_with_language: {e}")
+            return None
+    
+    def resolve_voice_params(self, text, language=None, speaker=None, model_id=None, task_id=None, audio_format=None):
+        log_prefix = f"Task {task_id}: " if task_id else ""
+        if language:
+            if language not in DEFAULT_SPEAKERS:
+                raise ValueError(f"Unsupported TTS language '{language}'")
+            speaker = speaker or DEFAULT_SPEAKERS[language]
+            print(f"{log_prefix}Using requested language: {language}, speaker: {speaker}")
+        elif self.auto_detect_language:
+            started = time.monotonic()
+            language = self.detect_language(text)
+            speaker = DEFAULT_SPEAKERS[language]
+            self.metrics.observe(STAGE_LANGUAGE_DETECTION, time.monotonic() - started, language, speaker)
+            print(f"{log_prefix}Auto-detected language: {language}, using speaker: {speaker}")
         else:
-            try:
-                future = self.executor.submit(self._process_single_text, text)
-                return future.result(timeout=DEFAULT_TTS_TIMEOUT)
-            except Exception as e:
-                print(f"Error in convert_text_with_language: {e}")
-                return None
+            language = self.language
+            speaker = speaker or self.speaker
+            print(f"{log_prefix}Using configured language: {language}, speaker: {speaker}")
+        
+        backend = self.get_backend(self.backend_name_for(language, speaker))
+        backend_voices = backend.voices().get(language, {})
+        if speaker not in backend_voices:
+            raise ValueError(f"Unknown speaker '{speaker}' for language '{language}' on TTS backend '{backend.name}'")
+        
+        return VoiceParams(
+            language=language,
+            speaker=speaker,
+            voice_id=backend_voices[speaker],
+            model_id=model_id or backend.model_id,
+            voice_settings=tuple(sorted(DEFAULT_VOICE_SETTINGS.items())),
+            backend=backend.name,
+            output_format=self._output_format_for(backend, audio_format)
+        )
+    
+    @staticmethod
+    def _output_format_for(backend, audio_format):
+        if audio_format and audio_format != backend.default_format and audio_format in backend.formats:
+            return audio_format
+        return ""
+    
+    def get_audio_format(self, voice):
+        return get_audio_format(voice.output_format or self.get_backend(voice.backend).default_format)
     
-    async def _text_to_speech_elevenlabs(self, text):
-        if self.auto_detect_language:
-            detected_language = self.detect_language(text)
-            current_speaker = DEFAULT_SPEAKERS[detected_language]
-            print(f"Auto-detected language: {detected_language}, using speaker: {current_speaker}")
+    async def _synthesize_to_file(self, text, task_id=None, voice=None):
+        voice = voice or self.resolve_voice_params(text, task_id=task_id)
+        
+        cache_key = None
+        if self.audio_cache:
+            cache_key = make_cache_key(voice.voice_id, voice.model_id, voice.settings, text, voice.output_format)
+            cached_path = self.audio_cache.get(cache_key)
+            if cached_path:
+                print(f"TTS cache hit: {cached_path}")
+                return cached_path
+        
+        winning_voice, audio_content = await self._synthesize(text, voice)
+        file_suffix = self.get_audio_format(winning_voice).file_suffix
+        
+        started = time.monotonic()
+        if self.audio_cache:
+            if winning_voice != voice:
+                cache_key = make_cache_key(winning_voice.voice_id, winning_voice.model_id, winning_voice.settings, text,
+                                           winning_voice.output_format)
+            audio_file_path = await asyncio.to_thread(self.audio_cache.put, cache_key, audio_content, file_suffix)
         else:
-            detected_language = self.language
-            current_speaker = self.speaker
-            print(f"Using configured language: {detected_language}, speaker: {current_speaker}")
-        
-        voice_id = LANGUAGE_DICT[detected_language][current_speaker]
-        
-        if not ENV_SETTINGS.ELEVENLABS_API_KEY:
-            raise ValueError("ELEVENLABS_API_KEY not found in environment settings")
-
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-        
-        headers = {
-            "Accept": "audio/mpeg",
-            "Content-Type": "application/json",
-            "xi-api-key": ENV_SETTINGS.ELEVENLABS_API_KEY
-        }
-        
-        data = {
-            "text": text,
-            "model_id": ENV_SETTINGS.ELEVENLABS_MODEL_ID,
-            "voice_settings": {
-                "stability": 0.5,
-                "similarity_boost": 0.5
-            }
-        }
-        
-        loop = asyncio.get_event_loop()
+            audio_dir = Path(AUDIO_OUTPUT_DIR)
+            audio_dir.mkdir(parents=True, exist_ok=True)
+            unique_filename = f"{task_id}_{uuid.uuid4().hex}{file_suffix}" if task_id else f"{uuid.uuid4().hex}{file_suffix}"
+            audio_file_path = audio_dir / unique_filename
+            await asyncio.to_thread(audio_file_path.write_bytes, audio_content)
+        self.metrics.observe_voice(STAGE_DISK_WRITE, time.monotonic() - started, winning_voice)
+            
+        return str(audio_file_path)
+    
+    async def _synthesize(self, text, voice):
+        async def run(target):
+            backend = self.get_backend(target.backend)
+            timings = {}
+            started = time.monotonic()
+            audio_content = await backend.synthesize(text, target.voice_id, target.settings, target.model_id, timings=timings,
+                                                     output_format=get_audio_format(target.output_format))
+            total = time.monotonic() - started
+            self.metrics.observe_voice(STAGE_UPSTREAM_TTFB, timings.get("ttfb", total), target)
+            self.metrics.observe_voice(STAGE_UPSTREAM_TOTAL, total, target)
+            return target, audio_content
+        
+        if not self.hedger:
+            return await run(voice)
+        
+        hedge_voice = self._hedge_voice(voice)
+        result, hedged = await self.hedger.call(
+            (voice.backend, voice.voice_id), lambda: run(voice),
+            (hedge_voice.backend, hedge_voice.voice_id), lambda: run(hedge_voice)
+        )
+        if hedged:
+            print(f"TTS hedge on backend '{hedge_voice.backend}' won for voice {voice.speaker}")
+        return result
+    
+    def _hedge_voice(self, voice):
+        name = ENV_SETTINGS.TTS_HEDGE_BACKEND
+        if not name or name == voice.backend:
+            return voice
+        try:
+            backend = self.get_backend(name)
+        except ValueError as e:
+            print(f"TTS hedge backend unavailable, hedging on '{voice.backend}': {e}")
+            return voice
+        voice_id = backend.voices().get(voice.language, {}).get(voice.speaker)
+        if not voice_id:
+            return voice
+        return replace(voice, voice_id=voice_id, model_id=backend.model_id, backend=backend.name,
+                       output_format=self._output_format_for(backend, voice.output_format))
+    
+    def get_stage_metrics(self):
+        return self.metrics.get_stats()
+    
+    def get_hedging_stats(self):
+        if not self.hedger:
+            return {"enabled": False}
+        return {"enabled": True, **self.hedger.get_stats()}
+    
+    async def stream_text(self, text, on_complete=None, chunk_size=DEFAULT_STREAM_CHUNK_SIZE, language=None, speaker=None,
+                          audio_format=None):
+        voice = self.resolve_voice_params(text, language=language, speaker=speaker, audio_format=audio_format)
+        
+        phrase = self.phrase_bank.get(voice, text)
+        if phrase:
+            for offset in range(0, len(phrase.audio), chunk_size):
+                yield phrase.audio[offset:offset + chunk_size]
+            if on_complete:
+                on_complete(phrase.path)
+            return
+        
+        cache_key = make_cache_key(voice.voice_id, voice.model_id, voice.settings, text, voice.output_format)
+        cached_path = self.audio_cache.get(cache_key) if self.audio_cache else None
+        cached_audio = None
+        if cached_path:
+            try:
+                cached_audio = await asyncio.to_thread(Path(cached_path).read_bytes)
+            except OSError as e:
+                print(f"TTS cache replay failed for {cached_path}: {e}")
+        if cached_audio is not None:
+            print(f"TTS cache hit (stream replay): {cached_path}")
+            for offset in range(0, len(cached_audio), chunk_size):
+                yield cached_audio[offset:offset + chunk_size]
+            if on_complete:
+                on_complete(cached_path)
+            return
+        
+        backend = self.get_backend(voice.backend)
+        output_format = self.get_audio_format(voice)
+        if self.audio_cache:
+            tee_path = self.audio_cache.temp_path_for(cache_key, output_format.file_suffix)
+        else:
+            tee_path = Path(AUDIO_OUTPUT_DIR) / f"{uuid.uuid4().hex}{output_format.file_suffix}"
         
-        def make_request():
-            response = requests.post(url, json=data, headers=headers)
-            if response.status_code != 200:
-                raise Exception(f"ElevenLabs API error: {response.text}")
-            return response.content
-
-        audio_content = await loop.run_in_executor(None, make_request)
+        tee = AudioTeeWriter(tee_path)
+        completed = False
+        started = time.monotonic()
+        first_chunk_at = None
+        try:
+            async for chunk in backend.stream(text, voice.voice_id, voice.settings, chunk_size, voice.model_id,
+                                              output_format=get_audio_format(voice.output_format)):
+                if first_chunk_at is None:
+                    first_chunk_at = time.monotonic()
+                    self.metrics.observe_voice(STAGE_UPSTREAM_TTFB, first_chunk_at - started, voice)
+                tee.write(chunk)
+                yield chunk
+            completed = True
+            self.metrics.observe_voice(STAGE_UPSTREAM_TOTAL, time.monotonic() - started, voice)
+        finally:
+            if not completed:
+                await tee.discard()
         
-        audio_dir = Path("static/audio")
-        audio_dir.mkdir(parents=True, exist_ok=True)
-        unique_filename = f"{uuid.uuid4().hex}.mp3"
-        audio_file_path = audio_dir / unique_filename
+        started = time.monotonic()
+        try:
+            await tee.close()
+        except OSError as e:
+            print(f"TTS stream tee write failed for {tee_path}: {e}")
+            await tee.discard()
+            return
+        if self.audio_cache:
+            audio_file_path = await asyncio.to_thread(self.audio_cache.put_file, cache_key, str(tee_path),
+                                                      output_format.file_suffix)
+        else:
+            audio_file_path = str(tee_path)
+        self.metrics.observe_voice(STAGE_DISK_WRITE, time.monotonic() - started, voice)
         
-        with open(audio_file_path, "wb") as f:
-            f.write(audio_content)
-            
-        return str(audio_file_path)
+        print(f"Streamed audio file: {audio_file_path}")
+        self.last_audio_file_path = audio_file_path
+        if on_complete:
+            on_complete(audio_file_path)
+    
+    async def aclose(self):
+        with self.backend_lock:
+            backends = list(self.backends.values())
+        for backend in backends:
+            await backend.aclose()
+    
+    def get_media_type(self, voice=None):
+        if voice is None:
+            return self.provider.media_type
+        return self.get_audio_format(voice).media_type
+    
+    def get_cache_stats(self):
+        if not self.audio_cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.audio_cache.get_stats()}
 
     def stop_tts(self):
         self.is_running = False
@@ -167,6 +397,22 @@ class RealTimeTTS:
         if self.executor:
             self.executor.shutdown(wait=True)
         
+        if self.audio_cache:
+            self.audio_cache.flush()
+        
+        if self.owns_timer_wheel:
+            self.timer_wheel.stop()
+        
+        with self.loop_lock:
+            if self.owns_loop and self.loop and not self.loop.is_closed():
+                try:
+                    asyncio.run_coroutine_threadsafe(self.aclose(), self.loop).result(timeout=5.0)
+                except Exception as e:
+                    print(f"Error closing TTS provider: {e}")
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.loop = None
+                self.owns_loop = False
+        
         if self.p:
             self.p.terminate()
 
@@ -247,14 +493,11 @@ class RealTimeTTS:
         with self.task_lock:
             self.active_tasks = [task for task in self.active_tasks if not task.done()]
     
-    def _process_single_text(self, text):
+    def _process_single_text(self, text, voice=None):
         try:
             self.is_playing = True
             
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            audio_file_path = loop.run_until_complete(self._text_to_speech_elevenlabs(text))
-            loop.close()
+            audio_file_path = self._run_coroutine(self._synthesize_to_file(text, voice=voice))
             
             print(f'Generated audio file: {audio_file_path}')
             self.last_audio_file_path = audio_file_path
@@ -262,13 +505,7 @@ class RealTimeTTS:
             self.is_playing = False
             
             if self.playback_finished_callback:
-                def delayed_callback():
-                    time.sleep(0.3)
-                    self.playback_finished_callback()
-                
-                callback_thread = threading.Thread(target=delayed_callback)
-                callback_thread.daemon = True
-                callback_thread.start()
+                self.timer_wheel.schedule(PLAYBACK_CALLBACK_DELAY, self.playback_finished_callback)
             
             return audio_file_path
             
@@ -302,47 +539,44 @@ class RealTimeTTS:
         if max_concurrent is None:
             max_concurrent = self.max_workers
         
-        results = []
+        pending = [text for text in texts if text.strip()]
+        total_count = len(pending)
+        results = [None] * total_count
         completed_count = 0
-        total_count = len([t for t in texts if t.strip()])
-        
-        batch_size = min(max_concurrent, total_count)
-        text_batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
-        
-        for batch in text_batches:
-            batch_futures = []
-            for text in batch:
-                if text.strip():
-                    future = self.executor.submit(self._process_single_text, text.strip())
-                    with self.task_lock:
-                        self.active_tasks.append(future)
-                    batch_futures.append((text, future))
+        in_flight = {}
+        next_index = 0
+        
+        while next_index < total_count or in_flight:
+            while next_index < total_count and len(in_flight) < max_concurrent:
+                future = self.executor.submit(self._process_single_text, pending[next_index].strip())
+                with self.task_lock:
+                    self.active_tasks.append(future)
+                in_flight[future] = next_index
+                next_index += 1
             
-            for text, future in batch_futures:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                completed_count += 1
                 try:
                     result = future.result()
-                    completed_count += 1
-                    results.append({
-                        'text': text,
+                    results[index] = {
+                        'text': pending[index],
                         'audio_file': result,
                         'success': result is not None,
                         'error': None
-                    })
-                    
-                    if callback:
-                        callback(completed_count, total_count, result)
-                        
+                    }
                 except Exception as e:
-                    completed_count += 1
-                    results.append({
-                        'text': text,
+                    result = None
+                    results[index] = {
+                        'text': pending[index],
                         'audio_file': None,
                         'success': False,
                         'error': str(e)
-                    })
-                    
-                    if callback:
-                        callback(completed_count, total_count, None)
+                    }
+                
+                if callback:
+                    callback(completed_count, total_count, result)
         
         return results
 
@@ -361,7 +595,8 @@ class RealTimeTTS:
             self.task_counter += 1
             return f"tts_task_{self.task_counter}_{int(time.time() * 1000)}"
     
-    def convert_text_synchronized(self, text, task_id=None, language=None, speaker=None):
+    def convert_text_synchronized(self, text, task_id=None, language=None, speaker=None, model_id=None, audio_format=None,
+                                  voice=None):
         if not text or not text.strip():
             return None
             
@@ -370,25 +605,27 @@ class RealTimeTTS:
         
         self.ensure_tts_ready()
         
-        original_settings = None
-        if language and speaker:
-            original_settings = {
-                'auto_detect': self.auto_detect_language,
-                'language': self.language,
-                'speaker': self.speaker
-            }
-            self.auto_detect_language = False
-            self.language = language
-            self.speaker = speaker
-        
         try:
-            future = self.executor.submit(self._process_single_text_synchronized, text.strip(), task_id)
+            text = text.strip()
+            voice = voice or self.resolve_voice_params(text, language=language, speaker=speaker, model_id=model_id,
+                                                       task_id=task_id, audio_format=audio_format)
+            synthesis_key = make_cache_key(voice.voice_id, voice.model_id, voice.settings, text, voice.output_format)
             
             with self.result_lock:
-                self.pending_tasks[task_id] = future
                 self.task_results[task_id] = None
-            
-            print(f"TTS task {task_id} submitted for text: '{text[:50]}{'...' if len(text) > 50 else ''}'")
+                future, coalesced = self.single_flight.do(
+                    synthesis_key,
+                    lambda: self.executor.submit(self._process_single_text_synchronized, text, task_id, voice)
+                )
+                self.task_futures[task_id] = future
+                if not coalesced:
+                    self.pending_tasks[task_id] = future
+            
+            if coalesced:
+                future.add_done_callback(lambda done: self._complete_coalesced_task(task_id, done))
+                print(f"TTS task {task_id} coalesced with in-flight request for text: '{text[:50]}{'...' if len(text) > 50 else ''}'")
+            else:
+                print(f"TTS task {task_id} submitted for text: '{text[:50]}{'...' if len(text) > 50 else ''}'")
             return task_id
             
         except Exception as e:
@@ -396,111 +633,94 @@ class RealTimeTTS:
             with self.result_lock:
                 self.task_results[task_id] = {"error": str(e), "audio_file": None}
             return task_id
-        finally:
-            if original_settings:
-                self.auto_detect_language = original_settings['auto_detect']
-                self.language = original_settings['language']
-                self.speaker = original_settings['speaker']
+    
+    def _complete_coalesced_task(self, task_id, future):
+        if future.cancelled():
+            result = {"error": "Task cancelled", "audio_file": None}
+        else:
+            audio_file_path = future.result()
+            result = audio_file_path if audio_file_path else {"error": "Coalesced TTS request failed", "audio_file": None}
+        
+        with self.result_lock:
+            if self.task_results.get(task_id, _MISSING) is not _MISSING:
+                self.task_results[task_id] = result
+    
+    def get_coalescing_stats(self):
+        return self.single_flight.get_stats()
     
     def get_audio_file_for_task(self, task_id, timeout=DEFAULT_TTS_TIMEOUT):
         if not task_id:
             return None
-            
-        start_time = time.time()
         
-        while time.time() - start_time < timeout:
-            with self.result_lock:
-                if task_id in self.task_results:
-                    result = self.task_results[task_id]
-                    
-                    if result is None:
-                        time.sleep(0.1)
-                        continue
-                    
-                    if isinstance(result, dict) and "error" in result:
-                        print(f"TTS task {task_id} failed: {result['error']}")
-                        return None
-                    
-                    if isinstance(result, str):
-                        print(f"TTS task {task_id} completed: {result}")
-                        return result
-                        
-            time.sleep(0.1)
-        
-        print(f"Timeout waiting for TTS task {task_id}")
+        with self.result_lock:
+            future = self.task_futures.get(task_id)
+        
+        audio_file_path = None
+        if future is not None:
+            try:
+                audio_file_path = future.result(timeout=timeout)
+            except FuturesTimeoutError:
+                print(f"Timeout waiting for TTS task {task_id}")
+                return None
+            except CancelledError:
+                pass
+        
+        return self._get_task_result(task_id, audio_file_path)
+    
+    async def wait_for_task_async(self, task_id, timeout=DEFAULT_TTS_TIMEOUT):
+        if not task_id:
+            return None
+        
+        with self.result_lock:
+            future = self.task_futures.get(task_id)
+        
+        audio_file_path = None
+        if future is not None:
+            try:
+                audio_file_path = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+            except asyncio.TimeoutError:
+                print(f"Timeout waiting for TTS task {task_id}")
+                return None
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+        
+        return self._get_task_result(task_id, audio_file_path)
+    
+    def _get_task_result(self, task_id, audio_file_path=None):
+        if isinstance(audio_file_path, str):
+            print(f"TTS task {task_id} completed: {audio_file_path}")
+            return audio_file_path
+        
+        with self.result_lock:
+            result = self.task_results.get(task_id)
+        
+        if isinstance(result, dict) and "error" in result:
+            print(f"TTS task {task_id} failed: {result['error']}")
+            return None
+        
+        if isinstance(result, str):
+            print(f"TTS task {task_id} completed: {result}")
+            return result
+        
         return None
     
-    def _process_single_text_synchronized(self, text, task_id):
+    def _process_single_text_synchronized(self, text, task_id, voice=None):
         try:
             print(f"Processing TTS task {task_id}: {text[:50]}{'...' if len(text) > 50 else ''}")
             
-            if self.auto_detect_language:
-                detected_language = self.detect_language(text)
-                current_speaker = DEFAULT_SPEAKERS[detected_language]
-                print(f"Task {task_id}: Auto-detected language: {detected_language}, speaker: {current_speaker}")
-            else:
-                detected_language = self.language
-                current_speaker = self.speaker
-                print(f"Task {task_id}: Using configured language: {detected_language}, speaker: {current_speaker}")
-            
-            voice_id = LANGUAGE_DICT[detected_language][current_speaker]
-            
-            async def generate_audio():
-                if not ENV_SETTINGS.ELEVENLABS_API_KEY:
-                    raise ValueError("ELEVENLABS_API_KEY not found")
-
-                url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-                headers = {
-                    "Accept": "audio/mpeg",
-                    "Content-Type": "application/json",
-                    "xi-api-key": ENV_SETTINGS.ELEVENLABS_API_KEY
-                }
-                data = {
-                    "text": text,
-                    "model_id": ENV_SETTINGS.ELEVENLABS_MODEL_ID,
-                    "voice_settings": {"stability": 0.5, "similarity_boost": 0.5}
-                }
-                
-                loop = asyncio.get_event_loop()
-                def make_request():
-                    response = requests.post(url, json=data, headers=headers)
-                    if response.status_code != 200:
-                        raise Exception(f"ElevenLabs API error: {response.text}")
-                    return response.content
-
-                audio_content = await loop.run_in_executor(None, make_request)
-                
-                audio_dir = Path("static/audio")
-                audio_dir.mkdir(parents=True, exist_ok=True)
-                unique_filename = f"{task_id}_{uuid.uuid4().hex}.mp3"
-                audio_file_path = audio_dir / unique_filename
-                
-                with open(audio_file_path, "wb") as f:
-                    f.write(audio_content)
-                return str(audio_file_path)
-            
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            audio_file_path = loop.run_until_complete(generate_audio())
-            loop.close()
+            audio_file_path = self._run_coroutine(self._synthesize_to_file(text, task_id, voice))
             
             with self.result_lock:
                 self.task_results[task_id] = audio_file_path
-                if task_id in self.pending_tasks:
-                    del self.pending_tasks[task_id]
+                self.pending_tasks.pop(task_id, None)
             
             print(f'Task {task_id} completed: Generated audio file: {audio_file_path}')
             
             self.last_audio_file_path = audio_file_path
             
             if self.playback_finished_callback:
-                def delayed_callback():
-                    time.sleep(0.3)
-                    self.playback_finished_callback()
-                
-                callback_thread = threading.Thread(target=delayed_callback)
-                callback_thread.daemon = True
-                callback_thread.start()
+                self.timer_wheel.schedule(PLAYBACK_CALLBACK_DELAY, self.playback_finished_callback)
             
             return audio_file_path
             
@@ -509,8 +729,7 @@ class RealTimeTTS:
             
             with self.result_lock:
                 self.task_results[task_id] = {"error": str(e), "audio_file": None}
-                if task_id in self.pending_tasks:
-                    del self.pending_tasks[task_id]
+                self.pending_tasks.pop(task_id, None)
             
             if self.playback_finished_callback:
                 self.playback_finished_callback()
@@ -521,37 +740,29 @@ class RealTimeTTS:
     
     def cleanup_completed_tasks_synchronized(self):
         with self.result_lock:
-            current_time = time.time()
-            tasks_to_remove = []
-            
-            for task_id, result in self.task_results.items():
-                try:
-                    timestamp_str = task_id.split('_')[-1]
-                    task_timestamp = int(timestamp_str) / 1000
-                    
-                    if current_time - task_timestamp > TASK_CLEANUP_AGE_SECONDS and result is not None:
-                        tasks_to_remove.append(task_id)
-                except (ValueError, IndexError):
-                    if result is not None:
-                        tasks_to_remove.append(task_id)
-            
-            for task_id in tasks_to_remove:
-                del self.task_results[task_id]
-                if task_id in self.task_completion_callbacks:
-                    del self.task_completion_callbacks[task_id]
+            removed = self.task_results.purge_expired()
+            self.task_futures.purge_expired()
+            self.pending_tasks.purge_expired()
             
-            if tasks_to_remove:
-                print(f"Cleaned up {len(tasks_to_remove)} completed TTS tasks")
+            if removed:
+                print(f"Cleaned up {removed} completed TTS tasks")
+    
+    def get_task_registry_stats(self):
+        return {
+            "task_results": self.task_results.get_stats(),
+            "task_futures": self.task_futures.get_stats(),
+            "pending_tasks": self.pending_tasks.get_stats(),
+        }
     
     def get_task_status(self, task_id):
         with self.result_lock:
-            if task_id in self.pending_tasks:
-                future = self.pending_tasks[task_id]
+            future = self.pending_tasks.get(task_id)
+            if future is not None:
                 if future.done():
-                    return "completed" if not future.exception() else "failed"
+                    return "failed" if future.cancelled() or future.exception() else "completed"
                 return "processing"
-            elif task_id in self.task_results:
-                result = self.task_results[task_id]
+            result = self.task_results.get(task_id, _MISSING)
+            if result is not _MISSING:
                 if result is None:
                     return "pending"
                 elif isinstance(result, dict) and "error" in result:
@@ -561,12 +772,12 @@ class RealTimeTTS:
     
     def cancel_task(self, task_id):
         with self.result_lock:
-            if task_id in self.pending_tasks:
-                future = self.pending_tasks[task_id]
-                if not future.done():
+            future = self.pending_tasks.get(task_id)
+            if future is not None:
+                if not future.done() and not self.single_flight.is_shared(future):
                     cancelled = future.cancel()
                     if cancelled:
-                        del self.pending_tasks[task_id]
+                        self.pending_tasks.pop(task_id, None)
                         self.task_results[task_id] = {"error": "Task cancelled", "audio_file": None}
                         return True
             return False
\ No newline at end of file
@@ -1,11 +1,19 @@
+import os
 import threading
 import time
 import queue
+import hashlib
 import logging
 import asyncio
-from typing import Optional, Callable
+from typing import Optional, Callable, AsyncIterator, Tuple
 
 from .audio_utils import TaskStatus, AudioTask, ThreadSafeCounter, AudioProcessor
+from .aging_queue import AgingPriorityQueue, DEFAULT_AGING_INTERVAL
+from .task_registry import TaskRegistry, DEFAULT_TASK_TTL_SECONDS, DEFAULT_MAX_TASK_ENTRIES
+from .tts_admission import AdmissionController, AdmissionPolicy, TTSAdmissionError, DEFAULT_ADMISSION_MAX_WAIT_SECONDS
+from .timer_wheel import TimerWheel
+from .tts_metrics import TTSStageMetrics, STAGE_QUEUE_WAIT, STAGE_ADAPTER_HANDOFF
+from .tts_utils import VoiceParams, split_into_segments, join_audio_segments
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,19 +22,26 @@ DEFAULT_TTS_TIMEOUT = 15.0
 DEFAULT_WAIT_TIMEOUT = 30.0
 
 class TTSAdapter(AudioProcessor):
-    def __init__(self, tts_instance, max_workers: int = 3, max_queue_size: int = 50):
+    def __init__(self, tts_instance, max_workers: int = 3, max_queue_size: int = 50,
+                 aging_interval: float = DEFAULT_AGING_INTERVAL, task_ttl_seconds: float = DEFAULT_TASK_TTL_SECONDS,
+                 max_task_entries: int = DEFAULT_MAX_TASK_ENTRIES, admission_policy: AdmissionPolicy = AdmissionPolicy.DEGRADE,
+                 admission_max_wait: float = DEFAULT_ADMISSION_MAX_WAIT_SECONDS, timer_wheel: Optional[TimerWheel] = None):
         self.tts_instance = tts_instance
         self.is_initialized = False
         self.is_speaking = False
         self.max_workers = max_workers
         self.task_counter = ThreadSafeCounter()
-        self.task_queue = queue.PriorityQueue(maxsize=max_queue_size)
+        self.task_queue = AgingPriorityQueue(maxsize=max_queue_size, aging_interval=aging_interval)
         self.active_tasks = {}
-        self.completed_tasks = {}
+        self.active_streams = 0
+        self.completed_tasks = TaskRegistry(task_ttl_seconds, max_task_entries)
+        self.admission = AdmissionController(admission_policy, max_workers, admission_max_wait)
+        self.timer_wheel = timer_wheel or getattr(tts_instance, 'timer_wheel', None) or TimerWheel()
+        self.metrics = getattr(tts_instance, 'metrics', None) or TTSStageMetrics()
         self.lock = threading.RLock()
         self.condition = threading.Condition(self.lock)
         self.stop_event = threading.Event()
-        self.queue_processor_thread = None
+        self.worker_threads = []
         self.completion_callbacks = []
         
     def add_completion_callback(self, callback: Callable[[str, str], None]):
@@ -37,13 +52,15 @@ class TTSAdapter(AudioProcessor):
         while not self.stop_event.is_set():
             try:
                 try:
-                    priority, task = self.task_queue.get(timeout=1.0)
+                    task = self.task_queue.get(timeout=1.0)
                 except queue.Empty:
                     continue
                 
-                if task is None:
-                    break
+                if task.completion.done():
+                    continue
                 
+                self.timer_wheel.cancel(task.deadline_timer)
+                self._observe_task(STAGE_QUEUE_WAIT, time.time() - task.timestamp, task)
                 with self.lock:
                     task.status = TaskStatus.PROCESSING
                     self.active_tasks[task.task_id] = task
@@ -51,7 +68,10 @@ class TTSAdapter(AudioProcessor):
 
                 
                 try:
+                    started = time.monotonic()
                     audio_path = self._process_tts_task(task)
+                    if audio_path:
+                        self.admission.record_service_time(time.monotonic() - started)
                     
                     with self.lock:
                         task.status = TaskStatus.COMPLETED
@@ -60,6 +80,8 @@ class TTSAdapter(AudioProcessor):
                         if task.task_id in self.active_tasks:
                             del self.active_tasks[task.task_id]
                     
+                    self._resolve_task(task, audio_path)
+                    
                     for callback in self.completion_callbacks:
                         try:
                             callback(task.task_id, audio_path)
@@ -76,21 +98,39 @@ class TTSAdapter(AudioProcessor):
                         if task.task_id in self.active_tasks:
                             del self.active_tasks[task.task_id]
                     
+                    self._resolve_task(task, None)
                     logger.error(f"TTS task {task.task_id} failed: {e}")
                 
                 finally:
-                    self.task_queue.task_done()
                     with self.condition:
                         self.condition.notify_all()
             except Exception as e:
                 logger.error(f"Error in queue processor: {e}")
     
+    def _observe_task(self, stage: str, seconds: float, task: AudioTask) -> None:
+        if task.voice is not None:
+            self.metrics.observe_voice(stage, seconds, task.voice)
+        else:
+            self.metrics.observe(stage, seconds, task.language, task.speaker)
+    
+    def _resolve_task(self, task: AudioTask, audio_path: Optional[str]) -> None:
+        if not task.completion.done():
+            task.resolved_at = time.monotonic()
+            task.completion.set_result(audio_path)
+    
     def _process_tts_task(self, task: AudioTask) -> Optional[str]:
         try:
             safe_text = task.text if isinstance(task.text, str) else str(task.text)
             
             if hasattr(self.tts_instance, 'convert_text_synchronized'):
-                tts_task_id = self.tts_instance.convert_text_synchronized(safe_text)
+                tts_task_id = self.tts_instance.convert_text_synchronized(
+                    safe_text,
+                    language=task.language,
+                    speaker=task.speaker,
+                    model_id=task.model_id,
+                    audio_format=task.audio_format,
+                    voice=task.voice
+                )
                 
                 if tts_task_id:
                     audio_path = self.tts_instance.get_audio_file_for_task(tts_task_id, timeout=DEFAULT_TTS_TIMEOUT)
@@ -135,7 +175,51 @@ class TTSAdapter(AudioProcessor):
             logger.error(f"Error processing TTS task {task.task_id}: {e}")
             raise
     
-    def speak_text_async(self, text: str, priority: int = 0) -> str:
+    def _admit(self, priority: int, max_wait: Optional[float] = None) -> None:
+        with self.lock:
+            depth = self.task_queue.qsize() + self.active_streams
+        reason = self.admission.check(depth, self.task_queue.maxsize, max_wait)
+        while reason and self.admission.policy == AdmissionPolicy.DROP_LOWEST:
+            dropped = self.task_queue.drop_lowest(priority)
+            if dropped is None:
+                break
+            self._defer_task(dropped)
+            depth -= 1
+            reason = self.admission.check(depth, self.task_queue.maxsize, max_wait)
+        
+        if reason:
+            logger.warning(f"TTS admission refused ({reason}) at queue depth {depth}")
+            raise self.admission.refuse(reason, depth)
+    
+    def admit_stream(self, priority: int = 1) -> None:
+        self._admit(priority)
+        self.admission.count("admitted")
+    
+    async def track_stream(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        with self.lock:
+            self.active_streams += 1
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            with self.lock:
+                self.active_streams -= 1
+    
+    def _defer_task(self, task: AudioTask) -> None:
+        with self.lock:
+            task.status = TaskStatus.DEFERRED
+            task.error = "Dropped for higher priority audio"
+            self.completed_tasks[task.task_id] = task
+            self.active_tasks.pop(task.task_id, None)
+        self.timer_wheel.cancel(task.deadline_timer)
+        self._resolve_task(task, None)
+        self.admission.count("dropped")
+        logger.warning(f"TTS task {task.task_id} (priority {task.priority}) dropped for higher priority audio")
+    
+    def speak_text_async(self, text: str, priority: int = 0, language: Optional[str] = None,
+                         speaker: Optional[str] = None, model_id: Optional[str] = None,
+                         max_wait: Optional[float] = None, audio_format: Optional[str] = None,
+                         voice: Optional[VoiceParams] = None) -> str:
         if not self.is_initialized:
             self._initialize_tts()
         
@@ -143,66 +227,180 @@ class TTSAdapter(AudioProcessor):
         task = AudioTask(
             task_id=task_id,
             text=text,
-            priority=priority
+            priority=priority,
+            language=language,
+            speaker=speaker,
+            model_id=model_id,
+            audio_format=audio_format,
+            voice=voice
         )
         
+        self._admit(priority, max_wait)
+        if task.voice is None:
+            task.voice = self._resolve_voice(text, language, speaker, model_id, audio_format)
+        with self.lock:
+            self.active_tasks[task_id] = task
         try:
-            self.task_queue.put((-priority, task), timeout=1.0)
-            
-            with self.lock:
-                self.active_tasks[task_id] = task
-            
-            return task_id
-            
+            self.task_queue.put_nowait(priority, task)
         except queue.Full:
-            logger.error("TTS queue is full, cannot add new task")
-            raise Exception("TTS queue is full")
+            with self.lock:
+                self.active_tasks.pop(task_id, None)
+            raise self.admission.refuse("queue_full", self.task_queue.qsize())
+        
+        if max_wait is not None:
+            task.deadline_timer = self.timer_wheel.schedule(max_wait, self._expire_task, task_id)
+        
+        self.admission.count("admitted")
+        return task_id
     
-    async def speak_text(self, text: str, priority: int = 0, timeout: float = DEFAULT_WAIT_TIMEOUT) -> Optional[str]:
-        task_id = self.speak_text_async(text, priority)
-        return await self.wait_for_task(task_id, timeout)
+    def _resolve_voice(self, text: str, language: Optional[str], speaker: Optional[str], model_id: Optional[str],
+                       audio_format: Optional[str]) -> Optional[VoiceParams]:
+        resolve = getattr(self.tts_instance, "resolve_voice_params", None)
+        if resolve is None or not isinstance(text, str) or not text.strip():
+            return None
+        try:
+            return resolve(text.strip(), language=language, speaker=speaker, model_id=model_id, audio_format=audio_format)
+        except ValueError:
+            return None
     
-    async def wait_for_task(self, task_id: str, timeout: float = DEFAULT_WAIT_TIMEOUT) -> Optional[str]:
-        start_time = time.time()
+    async def speak_text(self, text: str, priority: int = 0, timeout: float = DEFAULT_WAIT_TIMEOUT,
+                         language: Optional[str] = None, speaker: Optional[str] = None,
+                         model_id: Optional[str] = None, audio_format: Optional[str] = None) -> Optional[str]:
+        voice = self._resolve_voice(text, language, speaker, model_id, audio_format)
+        phrase_bank = getattr(self.tts_instance, "phrase_bank", None)
+        if phrase_bank is not None and voice is not None:
+            phrase = phrase_bank.lookup(text, voice=voice)
+            if phrase:
+                return phrase.path
         
-        while time.time() - start_time < timeout:
-            with self.lock:
-                if task_id in self.completed_tasks:
-                    task = self.completed_tasks[task_id]
-                    if task.status == TaskStatus.COMPLETED:
-                        return task.result
-                    elif task.status == TaskStatus.FAILED:
-                        logger.error(f"Task {task_id} failed: {task.error}")
-                        return None
+        task_id = self.speak_text_async(text, priority, language=language, speaker=speaker, model_id=model_id,
+                                        max_wait=timeout, audio_format=audio_format, voice=voice)
+        audio_path = await self.wait_for_task(task_id, timeout)
+        if audio_path is None and self.get_task_status(task_id) == TaskStatus.DEFERRED:
+            raise TTSAdmissionError("deferred", "dropped_for_higher_priority",
+                                    self.admission.estimate_wait(self.task_queue.qsize()))
+        return audio_path
+    
+    async def speak_text_segments(self, text: str, timeout: float = DEFAULT_WAIT_TIMEOUT, language: Optional[str] = None,
+                                  speaker: Optional[str] = None, priority: int = 1,
+                                  audio_format: Optional[str] = None) -> AsyncIterator[Tuple[int, Optional[str]]]:
+        if not self.is_initialized:
+            self._initialize_tts()
+        
+        self._admit(priority, timeout)
+        self.admission.count("admitted")
+        
+        segments = split_into_segments(text)
+        tts_task_ids = [
+            self.tts_instance.convert_text_synchronized(segment, language=language, speaker=speaker, audio_format=audio_format)
+            for segment in segments
+        ]
+        
+        try:
+            for index, tts_task_id in enumerate(tts_task_ids):
+                audio_path = await self.tts_instance.wait_for_task_async(tts_task_id, timeout)
+                yield index, audio_path
+        finally:
+            for tts_task_id in tts_task_ids:
+                self.tts_instance.cancel_task(tts_task_id)
+    
+    async def speak_text_segmented(self, text: str, timeout: float = DEFAULT_WAIT_TIMEOUT,
+                                   on_first_segment: Optional[Callable[[str], None]] = None,
+                                   language: Optional[str] = None, speaker: Optional[str] = None,
+                                   audio_format: Optional[str] = None) -> Optional[str]:
+        segment_paths = []
+        async for index, audio_path in self.speak_text_segments(text, timeout, language=language, speaker=speaker,
+                                                                audio_format=audio_format):
+            if not audio_path:
+                logger.warning(f"Segment {index} of segmented TTS failed")
+                return None
             
-            await asyncio.sleep(0.5)
+            if index == 0 and on_first_segment:
+                try:
+                    on_first_segment(audio_path)
+                except Exception as e:
+                    logger.error(f"Error in first segment callback: {e}")
+            segment_paths.append(audio_path)
+        
+        if not segment_paths:
+            return None
+        if len(segment_paths) == 1:
+            return segment_paths[0]
         
-        logger.warning(f"Timeout waiting for task {task_id}")
-        return None
+        extension = os.path.splitext(segment_paths[0])[1]
+        joined_name = hashlib.sha256("|".join(segment_paths).encode("utf-8")).hexdigest()
+        joined_path = os.path.join(os.path.dirname(segment_paths[0]), f"joined_{joined_name}{extension}")
+        if os.path.exists(joined_path):
+            return joined_path
+        return await asyncio.to_thread(join_audio_segments, segment_paths, joined_path)
     
-    def get_task_status(self, task_id: str) -> Optional[TaskStatus]:
+    async def wait_for_task(self, task_id: str, timeout: float = DEFAULT_WAIT_TIMEOUT) -> Optional[str]:
         with self.lock:
-            if task_id in self.active_tasks:
-                return self.active_tasks[task_id].status
-            elif task_id in self.completed_tasks:
-                return self.completed_tasks[task_id].status
+            task = self.active_tasks.get(task_id) or self.completed_tasks.get(task_id)
+        
+        if task is None:
+            logger.warning(f"Unknown TTS task {task_id}")
             return None
+        
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(task.completion)), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout waiting for task {task_id}")
+            return None
+        
+        if task.resolved_at is not None and task.result:
+            self._observe_task(STAGE_ADAPTER_HANDOFF, time.monotonic() - task.resolved_at, task)
+        
+        if task.status == TaskStatus.FAILED:
+            logger.error(f"Task {task_id} failed: {task.error}")
+            return None
+        return task.result
+    
+    def _expire_task(self, task_id: str) -> None:
+        with self.lock:
+            task = self.active_tasks.get(task_id)
+            if task is None or task.status != TaskStatus.PENDING:
+                return
+            task.status = TaskStatus.FAILED
+            task.error = "Timed out waiting in queue"
+            self.completed_tasks[task_id] = task
+            del self.active_tasks[task_id]
+        self._resolve_task(task, None)
+        logger.warning(f"TTS task {task_id} expired before a worker picked it up")
+    
+    def get_task_status(self, task_id: str) -> Optional[TaskStatus]:
+        with self.lock:
+            task = self.active_tasks.get(task_id) or self.completed_tasks.get(task_id)
+            return task.status if task else None
     
     def cancel_task(self, task_id: str) -> bool:
         with self.lock:
             if task_id in self.active_tasks:
                 task = self.active_tasks[task_id]
                 if task.status == TaskStatus.PENDING:
+                    self.timer_wheel.cancel(task.deadline_timer)
                     task.status = TaskStatus.FAILED
                     task.error = "Cancelled by user"
                     self.completed_tasks[task_id] = task
                     del self.active_tasks[task_id]
+                    self._resolve_task(task, None)
                     return True
             return False
     
     def get_queue_size(self) -> int:
         return self.task_queue.qsize()
     
+    def get_queue_metrics(self) -> dict:
+        return {
+            'workers': len([t for t in self.worker_threads if t.is_alive()]),
+            'max_workers': self.max_workers,
+            'queue_size': self.task_queue.qsize(),
+            'active_streams': self.active_streams,
+            'priorities': self.task_queue.get_metrics(),
+            'admission': self.admission.get_stats(),
+            'completed_tasks': self.completed_tasks.get_stats()
+        }
+    
     def get_active_task_count(self) -> int:
         with self.lock:
             return len(self.active_tasks)    
@@ -220,12 +418,17 @@ class TTSAdapter(AudioProcessor):
         else:
             self.tts_instance.is_running = True
         
-        self.queue_processor_thread = threading.Thread(
-            target=self._queue_processor, 
-            daemon=True,
-            name="TTS-QueueProcessor"
-        )
-        self.queue_processor_thread.start()
+        self.stop_event.clear()
+        self.task_queue.reopen()
+        self.worker_threads = []
+        for index in range(self.max_workers):
+            worker = threading.Thread(
+                target=self._queue_processor,
+                daemon=True,
+                name=f"TTS-QueueWorker-{index}"
+            )
+            worker.start()
+            self.worker_threads.append(worker)
         
         self.is_initialized = True
     
@@ -241,13 +444,12 @@ class TTSAdapter(AudioProcessor):
         
         self.stop_event.set()
         
-        try:
-            self.task_queue.put((-999, None), timeout=1.0)
-        except queue.Full:
-            pass
+        self.task_queue.close()
         
-        if self.queue_processor_thread and self.queue_processor_thread.is_alive():
-            self.queue_processor_thread.join(timeout=5.0)
+        for worker in self.worker_threads:
+            if worker.is_alive():
+                worker.join(timeout=5.0)
+        self.worker_threads = []
         
         if hasattr(self.tts_instance, 'stop_tts'):
             self.tts_instance.stop_tts()
@@ -255,11 +457,12 @@ class TTSAdapter(AudioProcessor):
         with self.lock:
             while not self.task_queue.empty():
                 try:
-                    self.task_queue.get_nowait()
-                    self.task_queue.task_done()
+                    self._resolve_task(self.task_queue.get_nowait(), None)
                 except queue.Empty:
                     break
             
+            for task in self.active_tasks.values():
+                self._resolve_task(task, None)
             self.active_tasks.clear()
             self.completed_tasks.clear()
             self.is_initialized = False
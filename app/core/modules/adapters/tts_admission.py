@@ -0,0 +1,70 @@
+import threading
+from enum import Enum
+from typing import Any, Dict, Optional
+
+DEFAULT_ADMISSION_MAX_WAIT_SECONDS = 10.0
+DEFAULT_SERVICE_TIME_SECONDS = 1.0
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+class AdmissionPolicy(Enum):
+    REJECT = "reject"
+    DEGRADE = "degrade"
+    DROP_LOWEST = "drop_lowest"
+
+
+class TTSAdmissionError(Exception):
+    def __init__(self, status: str, reason: str, retry_after: float):
+        super().__init__(f"TTS audio {status}: {reason}")
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"status": self.status, "reason": self.reason, "retry_after": round(self.retry_after, 2)}
+
+
+class AdmissionController:
+    def __init__(self, policy: AdmissionPolicy = AdmissionPolicy.DEGRADE, workers: int = 1,
+                 max_wait_seconds: float = DEFAULT_ADMISSION_MAX_WAIT_SECONDS,
+                 initial_service_time: float = DEFAULT_SERVICE_TIME_SECONDS):
+        self.policy = policy
+        self.workers = max(1, workers)
+        self.max_wait_seconds = max_wait_seconds
+        self.service_time = initial_service_time
+        self.counts = {"admitted": 0, "rejected": 0, "deferred": 0, "dropped": 0}
+        self.lock = threading.Lock()
+
+    def record_service_time(self, seconds: float) -> None:
+        with self.lock:
+            self.service_time += SERVICE_TIME_SMOOTHING * (seconds - self.service_time)
+
+    def estimate_wait(self, depth: int) -> float:
+        with self.lock:
+            return (depth / self.workers + 1) * self.service_time
+
+    def check(self, depth: int, maxsize: int, max_wait: Optional[float] = None) -> Optional[str]:
+        if maxsize > 0 and depth >= maxsize:
+            return "queue_full"
+        limit = self.max_wait_seconds if max_wait is None else min(max_wait, self.max_wait_seconds)
+        if self.estimate_wait(depth) > limit:
+            return "service_time"
+        return None
+
+    def refuse(self, reason: str, depth: int) -> TTSAdmissionError:
+        status = "rejected" if self.policy == AdmissionPolicy.REJECT else "deferred"
+        self.count(status)
+        return TTSAdmissionError(status, reason, self.estimate_wait(depth))
+
+    def count(self, outcome: str) -> None:
+        with self.lock:
+            self.counts[outcome] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "policy": self.policy.value,
+                "max_wait_seconds": self.max_wait_seconds,
+                "service_time_seconds": self.service_time,
+                **self.counts,
+            }
@@ -0,0 +1,228 @@
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "static/audio"
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_CACHE_MAX_ENTRIES = 5000
+CACHE_INDEX_FILENAME = ".tts_cache_index.json"
+CACHE_INDEX_VERSION = 1
+DEFAULT_INDEX_FLUSH_SECONDS = 5.0
+
+
+def normalize_tts_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def make_cache_key(voice_id: str, model_id: str, voice_settings: Optional[Dict[str, Any]], text: str,
+                   output_format: Optional[str] = None) -> str:
+    fields = [voice_id, model_id, voice_settings or {}, normalize_tts_text(text)]
+    if output_format:
+        fields.append(output_format)
+    payload = json.dumps(
+        fields,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSAudioCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+                 max_entries: int = DEFAULT_CACHE_MAX_ENTRIES, timer_wheel=None,
+                 flush_interval: float = DEFAULT_INDEX_FLUSH_SECONDS):
+        self.cache_dir = Path(cache_dir)
+        self.index_path = self.cache_dir / CACHE_INDEX_FILENAME
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.index_dirty = False
+        self.timer_wheel = timer_wheel
+        self.flush_interval = flush_interval
+        self.flush_timer: Optional[int] = None
+        self.last_saved = time.monotonic()
+        self.lock = threading.RLock()
+        self._load_index()
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if not os.path.exists(entry["path"]):
+                self._drop(key)
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            entry["last_access"] = time.time()
+            self.hits += 1
+            self.index_dirty = True
+            return entry["path"]
+
+    def put(self, key: str, audio_content: bytes, suffix: str = ".mp3") -> str:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self.temp_path_for(key, suffix)
+
+        with open(temp_path, "wb") as f:
+            f.write(audio_content)
+
+        return self.put_file(key, str(temp_path), suffix)
+
+    def temp_path_for(self, key: str, suffix: str = ".mp3") -> Path:
+        return self.cache_dir / f".{key}{suffix}.{uuid.uuid4().hex}.tmp"
+
+    def put_file(self, key: str, source_path: str, suffix: str = ".mp3") -> str:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        audio_file_path = self.cache_dir / f"{key}{suffix}"
+        os.replace(source_path, audio_file_path)
+        size = os.path.getsize(audio_file_path)
+
+        with self.lock:
+            if key in self.entries:
+                self._drop(key, remove_file=False)
+
+            now = time.time()
+            self.entries[key] = {
+                "path": str(audio_file_path),
+                "size": size,
+                "created": now,
+                "last_access": now,
+            }
+            self.total_bytes += size
+            self._evict()
+            self.index_dirty = True
+            self._schedule_flush()
+
+        return str(audio_file_path)
+
+    def contains_path(self, path: str) -> bool:
+        key = Path(path).stem
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry is not None and os.path.abspath(entry["path"]) == os.path.abspath(path)
+
+    def get_pinned_files(self) -> list:
+        with self.lock:
+            return [entry["path"] for entry in self.entries.values()]
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.flush_timer is not None and self.timer_wheel is not None:
+                self.timer_wheel.cancel(self.flush_timer)
+            self.flush_timer = None
+            if self.index_dirty:
+                self._save_index()
+
+    def _scheduled_flush(self) -> None:
+        with self.lock:
+            self.flush_timer = None
+        self.flush()
+
+    def _schedule_flush(self) -> None:
+        overdue = time.monotonic() - self.last_saved >= self.flush_interval * 2
+        if self.timer_wheel is None or overdue:
+            if overdue or time.monotonic() - self.last_saved >= self.flush_interval:
+                self._save_index()
+            return
+        if self.flush_timer is None:
+            self.flush_timer = self.timer_wheel.schedule(self.flush_interval, self._scheduled_flush)
+
+    def clear(self) -> None:
+        with self.lock:
+            for key in list(self.entries.keys()):
+                self._drop(key)
+            self._save_index()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def _evict(self) -> None:
+        while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            key = next(iter(self.entries))
+            self._drop(key)
+            self.evictions += 1
+
+    def _drop(self, key: str, remove_file: bool = True) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+
+        self.total_bytes -= entry["size"]
+        self.index_dirty = True
+        if remove_file:
+            try:
+                os.unlink(entry["path"])
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove cached audio {entry['path']}: {e}")
+
+    def _load_index(self) -> None:
+        if not self.index_path.exists():
+            return
+
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable TTS cache index {self.index_path}: {e}")
+            return
+
+        if index.get("version") != CACHE_INDEX_VERSION:
+            return
+
+        for key, entry in index.get("entries", []):
+            try:
+                size = os.path.getsize(entry["path"])
+            except OSError:
+                continue
+            entry["size"] = size
+            self.entries[key] = entry
+            self.total_bytes += size
+
+        self._evict()
+
+    def _save_index(self) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_suffix(".tmp")
+        index = {
+            "version": CACHE_INDEX_VERSION,
+            "entries": [[key, entry] for key, entry in self.entries.items()],
+        }
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+            self.index_dirty = False
+            self.last_saved = time.monotonic()
+        except OSError as e:
+            logger.warning(f"Could not persist TTS cache index: {e}")
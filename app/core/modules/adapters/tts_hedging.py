@@ -0,0 +1,152 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+DEFAULT_HEDGE_PERCENTILE = 95.0
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+DEFAULT_HEDGE_WINDOW_SIZE = 200
+DEFAULT_HEDGE_MAX_RATE = 0.05
+DEFAULT_HEDGE_BUDGET_WINDOW_SECONDS = 60.0
+
+
+class LatencyTracker:
+    def __init__(self, window_size: int = DEFAULT_HEDGE_WINDOW_SIZE, min_samples: int = DEFAULT_HEDGE_MIN_SAMPLES):
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.samples: Dict[Hashable, Deque[float]] = {}
+        self.lock = threading.Lock()
+
+    def record(self, key: Hashable, seconds: float) -> None:
+        with self.lock:
+            window = self.samples.get(key)
+            if window is None:
+                window = self.samples[key] = deque(maxlen=self.window_size)
+            window.append(seconds)
+
+    def percentile(self, key: Hashable, percentile: float) -> Optional[float]:
+        with self.lock:
+            window = self.samples.get(key)
+            if window is None or len(window) < self.min_samples:
+                return None
+            ordered = sorted(window)
+        index = min(len(ordered) - 1, int(round(percentile / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def get_stats(self, percentile: float) -> Dict[str, Any]:
+        with self.lock:
+            keys = list(self.samples)
+            counts = {key: len(window) for key, window in self.samples.items()}
+        return {
+            str(key): {"samples": counts[key], "threshold": self.percentile(key, percentile)}
+            for key in keys
+        }
+
+
+class HedgeBudget:
+    def __init__(self, max_rate: float = DEFAULT_HEDGE_MAX_RATE, window_seconds: float = DEFAULT_HEDGE_BUDGET_WINDOW_SECONDS):
+        self.max_rate = max_rate
+        self.window_seconds = window_seconds
+        self.requests: Deque[float] = deque()
+        self.hedges: Deque[float] = deque()
+        self.lock = threading.Lock()
+
+    def note_request(self) -> None:
+        now = time.monotonic()
+        with self.lock:
+            self.requests.append(now)
+            self._purge(now)
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            self._purge(now)
+            if len(self.hedges) + 1 > self.max_rate * len(self.requests):
+                return False
+            self.hedges.append(now)
+            return True
+
+    def _purge(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        for window in (self.requests, self.hedges):
+            while window and window[0] < cutoff:
+                window.popleft()
+
+
+class HedgedCaller:
+    def __init__(self, percentile: float = DEFAULT_HEDGE_PERCENTILE, min_samples: int = DEFAULT_HEDGE_MIN_SAMPLES,
+                 window_size: int = DEFAULT_HEDGE_WINDOW_SIZE, max_rate: float = DEFAULT_HEDGE_MAX_RATE,
+                 budget_window_seconds: float = DEFAULT_HEDGE_BUDGET_WINDOW_SECONDS):
+        self.percentile = percentile
+        self.tracker = LatencyTracker(window_size, min_samples)
+        self.budget = HedgeBudget(max_rate, budget_window_seconds)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+        self.lock = threading.Lock()
+
+    async def call(self, key: Hashable, primary: Callable[[], Awaitable[Any]],
+                   hedge_key: Hashable, hedge: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        self.budget.note_request()
+        with self.lock:
+            self.requests += 1
+
+        threshold = self.tracker.percentile(key, self.percentile)
+        started = time.monotonic()
+        primary_task = asyncio.ensure_future(primary())
+        primary_task.add_done_callback(lambda done: self._record(key, started, done))
+
+        hedge_task = None
+        try:
+            if threshold is None:
+                return await primary_task, False
+
+            done, _ = await asyncio.wait({primary_task}, timeout=threshold)
+            if done:
+                return primary_task.result(), False
+
+            if not self.budget.try_acquire():
+                with self.lock:
+                    self.budget_denied += 1
+                return await primary_task, False
+
+            with self.lock:
+                self.hedges += 1
+            hedge_started = time.monotonic()
+            hedge_task = asyncio.ensure_future(hedge())
+            hedge_task.add_done_callback(lambda done: self._record(hedge_key, hedge_started, done))
+
+            pending = {primary_task, hedge_task}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if not task.cancelled() and task.exception() is None]
+                if succeeded:
+                    winner = succeeded[0]
+                    if winner is hedge_task:
+                        with self.lock:
+                            self.hedge_wins += 1
+                    return winner.result(), winner is hedge_task
+            return await primary_task, False
+        finally:
+            for task in (primary_task, hedge_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def _record(self, key: Hashable, started: float, task: asyncio.Future) -> None:
+        if task.cancelled() or task.exception() is None:
+            self.tracker.record(key, time.monotonic() - started)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "budget_denied": self.budget_denied,
+                "hedge_rate": (self.hedges / self.requests) if self.requests else 0.0,
+            }
+        stats["percentile"] = self.percentile
+        stats["voices"] = self.tracker.get_stats(self.percentile)
+        return stats
@@ -0,0 +1,82 @@
+import math
+import bisect
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf
+)
+UNKNOWN_LABEL = "auto"
+
+STAGE_QUEUE_WAIT = "queue_wait"
+STAGE_LANGUAGE_DETECTION = "language_detection"
+STAGE_UPSTREAM_TTFB = "upstream_ttfb"
+STAGE_UPSTREAM_TOTAL = "upstream_total"
+STAGE_DISK_WRITE = "disk_write"
+STAGE_ADAPTER_HANDOFF = "adapter_handoff"
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_seconds": self.total,
+            "mean_seconds": (self.total / self.count) if self.count else 0.0,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "p99_seconds": self.quantile(0.99),
+            "max_seconds": self.max,
+            "buckets": {
+                ("+Inf" if math.isinf(bound) else str(bound)): bucket_count
+                for bound, bucket_count in zip(self.buckets, self.counts)
+            },
+        }
+
+
+class TTSStageMetrics:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.histograms: Dict[Tuple[str, str, str], LatencyHistogram] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, language: Optional[str] = None, speaker: Optional[str] = None) -> None:
+        key = (stage, language or UNKNOWN_LABEL, speaker or UNKNOWN_LABEL)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram(self.buckets)
+            histogram.observe(seconds)
+
+    def observe_voice(self, stage: str, seconds: float, voice) -> None:
+        self.observe(stage, seconds, voice.language, voice.speaker)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stages: Dict[str, Any] = {}
+        with self.lock:
+            for (stage, language, speaker), histogram in sorted(self.histograms.items()):
+                stages.setdefault(stage, {}).setdefault(language, {})[speaker] = histogram.get_stats()
+        return stages
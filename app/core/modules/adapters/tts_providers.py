@@ -0,0 +1,288 @@
+import io
+import math
+import time
+import wave
+import array
+import asyncio
+import hashlib
+import threading
+import httpx
+import numpy as np
+from typing import AsyncIterator, Dict, Protocol, runtime_checkable
+try:
+    import h2
+    H2_AVAILABLE = True
+except Exception:
+    h2 = None
+    H2_AVAILABLE = False
+
+from app.Config import ENV_SETTINGS
+from .tts_utils import LANGUAGE_DICT
+
+ELEVENLABS_TTS_PATH = "/v1/text-to-speech"
+DEFAULT_STREAM_CHUNK_SIZE = 4096
+
+FAKE_SAMPLE_RATE = 16000
+FAKE_SECONDS_PER_CHAR = 0.04
+FAKE_MAX_SECONDS = 20.0
+FAKE_FIRST_CHUNK_DELAY = 0.05
+FAKE_CHUNK_DELAY = 0.01
+
+LOCAL_SAMPLE_RATE = 16000
+LOCAL_SYLLABLE_SECONDS = 0.14
+LOCAL_WORD_GAP_SECONDS = 0.06
+LOCAL_PAUSE_SECONDS = 0.25
+LOCAL_MAX_SECONDS = 60.0
+LOCAL_PAUSE_CHARS = ".,!?;:।॥"
+
+
+@runtime_checkable
+class TTSBackend(Protocol):
+    name: str
+    media_type: str
+    file_suffix: str
+    formats: tuple
+    default_format: str
+    model_id: str
+
+    def voices(self) -> Dict[str, Dict[str, str]]: ...
+
+    async def synthesize(self, text, voice_id, voice_settings, model_id=None, timings=None, output_format=None) -> bytes: ...
+
+    def stream(self, text, voice_id, voice_settings, chunk_size=DEFAULT_STREAM_CHUNK_SIZE, model_id=None,
+               output_format=None) -> AsyncIterator[bytes]: ...
+
+    async def aclose(self) -> None: ...
+
+
+class ElevenLabsProvider:
+    name = "elevenlabs"
+    media_type = "audio/mpeg"
+    file_suffix = ".mp3"
+    formats = ("mp3", "mp3_compact", "opus")
+    default_format = "mp3"
+
+    def __init__(self, api_key=None, model_id=None, base_url=None):
+        self.api_key = api_key or ENV_SETTINGS.ELEVENLABS_API_KEY
+        self.model_id = model_id or ENV_SETTINGS.ELEVENLABS_MODEL_ID
+        self.base_url = (base_url or ENV_SETTINGS.ELEVENLABS_API_BASE_URL).rstrip("/")
+        self.clients = {}
+        self.client_lock = threading.Lock()
+
+    def voices(self):
+        return LANGUAGE_DICT
+
+    def get_client(self):
+        loop = asyncio.get_running_loop()
+        with self.client_lock:
+            client = self.clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    http2=ENV_SETTINGS.TTS_HTTP2_ENABLED and H2_AVAILABLE,
+                    timeout=httpx.Timeout(
+                        ENV_SETTINGS.TTS_HTTP_READ_TIMEOUT,
+                        connect=ENV_SETTINGS.TTS_HTTP_CONNECT_TIMEOUT
+                    ),
+                    limits=httpx.Limits(
+                        max_connections=ENV_SETTINGS.TTS_HTTP_POOL_SIZE,
+                        max_keepalive_connections=ENV_SETTINGS.TTS_HTTP_POOL_SIZE,
+                        keepalive_expiry=ENV_SETTINGS.TTS_HTTP_KEEPALIVE_EXPIRY
+                    )
+                )
+                self.clients[loop] = client
+            return client
+
+    async def aclose(self):
+        loop = asyncio.get_running_loop()
+        with self.client_lock:
+            client = self.clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    def _build_request(self, text, voice_id, voice_settings, model_id=None, stream=False, output_format=None):
+        if not self.api_key:
+            raise ValueError("ELEVENLABS_API_KEY not found in environment settings")
+
+        url = f"{self.base_url}{ELEVENLABS_TTS_PATH}/{voice_id}"
+        if stream:
+            url = f"{url}/stream"
+        if output_format:
+            url = f"{url}?output_format={output_format.codec}_{output_format.sample_rate}_{output_format.bitrate_kbps}"
+        headers = {
+            "Accept": output_format.media_type if output_format else self.media_type,
+            "Content-Type": "application/json",
+            "xi-api-key": self.api_key
+        }
+        data = {
+            "text": text,
+            "model_id": model_id or self.model_id,
+            "voice_settings": voice_settings
+        }
+        return url, headers, data
+
+    async def synthesize(self, text, voice_id, voice_settings, model_id=None, timings=None, output_format=None):
+        url, headers, data = self._build_request(text, voice_id, voice_settings, model_id, output_format=output_format)
+        started = time.monotonic()
+        async with self.get_client().stream("POST", url, json=data, headers=headers) as response:
+            if timings is not None:
+                timings["ttfb"] = time.monotonic() - started
+            audio_content = await response.aread()
+        if response.status_code != 200:
+            raise Exception(f"ElevenLabs API error: {audio_content.decode('utf-8', errors='replace')}")
+        return audio_content
+
+    async def stream(self, text, voice_id, voice_settings, chunk_size=DEFAULT_STREAM_CHUNK_SIZE, model_id=None,
+                     output_format=None) -> AsyncIterator[bytes]:
+        url, headers, data = self._build_request(text, voice_id, voice_settings, model_id, stream=True,
+                                                  output_format=output_format)
+
+        async with self.get_client().stream("POST", url, json=data, headers=headers) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                raise Exception(f"ElevenLabs API error: {body.decode('utf-8', errors='replace')}")
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+
+
+class FakeTTSProvider:
+    name = "fake"
+    media_type = "audio/wav"
+    file_suffix = ".wav"
+    formats = ("wav",)
+    default_format = "wav"
+    model_id = "fake-tone-v1"
+
+    def __init__(self, first_chunk_delay=FAKE_FIRST_CHUNK_DELAY, chunk_delay=FAKE_CHUNK_DELAY,
+                 sample_rate=FAKE_SAMPLE_RATE):
+        self.first_chunk_delay = first_chunk_delay
+        self.chunk_delay = chunk_delay
+        self.sample_rate = sample_rate
+
+    def voices(self):
+        return LANGUAGE_DICT
+
+    def render(self, text, voice_id):
+        digest = hashlib.sha256(f"{voice_id}:{text}".encode("utf-8")).digest()
+        frequency = 220 + digest[0] * 2
+        duration = min(FAKE_MAX_SECONDS, max(0.2, len(text) * FAKE_SECONDS_PER_CHAR))
+        sample_count = int(duration * self.sample_rate)
+        step = 2 * math.pi * frequency / self.sample_rate
+        samples = array.array("h", (int(8000 * math.sin(step * i)) for i in range(sample_count)))
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(samples.tobytes())
+        return buffer.getvalue()
+
+    async def aclose(self):
+        pass
+
+    async def synthesize(self, text, voice_id, voice_settings, model_id=None, timings=None, output_format=None):
+        started = time.monotonic()
+        await asyncio.sleep(self.first_chunk_delay)
+        if timings is not None:
+            timings["ttfb"] = time.monotonic() - started
+        return self.render(text, voice_id)
+
+    async def stream(self, text, voice_id, voice_settings, chunk_size=DEFAULT_STREAM_CHUNK_SIZE, model_id=None,
+                     output_format=None) -> AsyncIterator[bytes]:
+        audio_content = self.render(text, voice_id)
+        await asyncio.sleep(self.first_chunk_delay)
+        for offset in range(0, len(audio_content), chunk_size):
+            if offset:
+                await asyncio.sleep(self.chunk_delay)
+            yield audio_content[offset:offset + chunk_size]
+
+
+class LocalTTSProvider:
+    name = "local"
+    media_type = "audio/wav"
+    file_suffix = ".wav"
+    formats = ("wav",)
+    default_format = "wav"
+    model_id = "local-syllable-v1"
+
+    def __init__(self, sample_rate=LOCAL_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+
+    def voices(self):
+        return LANGUAGE_DICT
+
+    def _syllable(self, pitch, seconds, seed):
+        t = np.arange(int(seconds * self.sample_rate)) / self.sample_rate
+        glide = pitch * (1.0 + 0.08 * np.sin(np.pi * t / seconds) * (1 if seed & 1 else -1))
+        phase = 2 * np.pi * np.cumsum(glide) / self.sample_rate
+        first_formant = 2 + (seed >> 1) % 4
+        second_formant = 6 + (seed >> 3) % 8
+        wave_form = np.sin(phase) + 0.5 * np.sin(first_formant * phase) + 0.25 * np.sin(second_formant * phase)
+        envelope = np.minimum(1.0, np.minimum(t, seconds - t) / 0.02)
+        return wave_form * envelope
+
+    def render(self, text, voice_id):
+        voice_digest = hashlib.sha256(voice_id.encode("utf-8")).digest()
+        base_pitch = 110 + voice_digest[0] % 110
+        word_gap = np.zeros(int(LOCAL_WORD_GAP_SECONDS * self.sample_rate))
+        pause = np.zeros(int(LOCAL_PAUSE_SECONDS * self.sample_rate))
+        max_samples = int(LOCAL_MAX_SECONDS * self.sample_rate)
+
+        pieces = []
+        total = 0
+        for word in text.split():
+            core = word.strip(LOCAL_PAUSE_CHARS)
+            if core:
+                digest = hashlib.sha256(f"{voice_id}:{core}".encode("utf-8")).digest()
+                for index in range(1, min(len(digest), 1 + max(1, (len(core) + 2) // 3))):
+                    pitch = base_pitch * (0.85 + digest[index] / 850)
+                    pieces.append(self._syllable(pitch, LOCAL_SYLLABLE_SECONDS, digest[index]))
+                    total += len(pieces[-1])
+                pieces.append(word_gap)
+                total += len(word_gap)
+            if word[-1] in LOCAL_PAUSE_CHARS:
+                pieces.append(pause)
+                total += len(pause)
+            if total >= max_samples:
+                break
+
+        samples = np.concatenate(pieces)[:max_samples] if pieces else np.zeros(int(0.2 * self.sample_rate))
+        pcm = (samples / 1.75 * 9000).astype("<i2")
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(pcm.tobytes())
+        return buffer.getvalue()
+
+    async def aclose(self):
+        pass
+
+    async def synthesize(self, text, voice_id, voice_settings, model_id=None, timings=None, output_format=None):
+        started = time.monotonic()
+        audio_content = await asyncio.to_thread(self.render, text, voice_id)
+        if timings is not None:
+            timings["ttfb"] = time.monotonic() - started
+        return audio_content
+
+    async def stream(self, text, voice_id, voice_settings, chunk_size=DEFAULT_STREAM_CHUNK_SIZE, model_id=None,
+                     output_format=None) -> AsyncIterator[bytes]:
+        audio_content = await asyncio.to_thread(self.render, text, voice_id)
+        for offset in range(0, len(audio_content), chunk_size):
+            yield audio_content[offset:offset + chunk_size]
+
+
+TTS_PROVIDERS = {
+    ElevenLabsProvider.name: ElevenLabsProvider,
+    FakeTTSProvider.name: FakeTTSProvider,
+    LocalTTSProvider.name: LocalTTSProvider,
+}
+
+
+def create_tts_provider(name=None):
+    name = (name or ENV_SETTINGS.TTS_PROVIDER or ElevenLabsProvider.name).lower()
+    if name not in TTS_PROVIDERS:
+        raise ValueError(f"Unknown TTS provider '{name}'. Available: {', '.join(TTS_PROVIDERS)}")
+    return TTS_PROVIDERS[name]()
@@ -1,4 +1,8 @@
+import os
 import re
+import wave
+import threading
+from dataclasses import dataclass
 
 LANGUAGE_DICT = {
     "English": {
@@ -19,6 +23,21 @@ DEFAULT_SPEAKERS = {
 
 HINDI_DETECTION_THRESHOLD = 0.25
 
+
+@dataclass(frozen=True)
+class VoiceParams:
+    language: str
+    speaker: str
+    voice_id: str
+    model_id: str
+    voice_settings: tuple = ()
+    backend: str = ""
+    output_format: str = ""
+
+    @property
+    def settings(self) -> dict:
+        return dict(self.voice_settings)
+
 def detect_language(text: str) -> str:
     hindi_pattern = r'[\u0900-\u097F]'
     
@@ -32,3 +51,84 @@ def detect_language(text: str) -> str:
     else:
         return "English"
 
+
+
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?।॥])\s+|\n+')
+CLAUSE_BOUNDARY_PATTERN = re.compile(r'(?<=[,;:—])\s+')
+DEFAULT_SEGMENT_MIN_CHARS = 40
+DEFAULT_SEGMENT_MAX_CHARS = 250
+
+
+def _split_long_segment(segment: str, max_chars: int) -> list:
+    if len(segment) <= max_chars:
+        return [segment]
+
+    pieces = []
+    current = ""
+    for clause in CLAUSE_BOUNDARY_PATTERN.split(segment):
+        for word in (clause.split(" ") if len(clause) > max_chars else [clause]):
+            candidate = f"{current} {word}".strip()
+            if current and len(candidate) > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_segments(text: str, min_chars: int = DEFAULT_SEGMENT_MIN_CHARS,
+                        max_chars: int = DEFAULT_SEGMENT_MAX_CHARS) -> list:
+    sentences = [s.strip() for s in SENTENCE_BOUNDARY_PATTERN.split(text.strip()) if s and s.strip()]
+
+    segments = []
+    current = ""
+    for sentence in sentences:
+        for piece in _split_long_segment(sentence, max_chars):
+            if current and len(current) < min_chars and len(current) + len(piece) + 1 <= min(max_chars, min_chars * 3):
+                current = f"{current} {piece}"
+                continue
+            if current:
+                segments.append(current)
+            current = piece
+    if current:
+        if segments and len(current) < min_chars and len(segments[-1]) + len(current) + 1 <= min(max_chars, min_chars * 3):
+            segments[-1] = f"{segments[-1]} {current}"
+        else:
+            segments.append(current)
+    return segments
+
+
+def _strip_id3_tags(audio_content: bytes) -> bytes:
+    if audio_content[:3] == b"ID3" and len(audio_content) >= 10:
+        size = ((audio_content[6] & 0x7F) << 21 | (audio_content[7] & 0x7F) << 14 |
+                (audio_content[8] & 0x7F) << 7 | (audio_content[9] & 0x7F))
+        audio_content = audio_content[10 + size:]
+    if len(audio_content) >= 128 and audio_content[-128:-125] == b"TAG":
+        audio_content = audio_content[:-128]
+    return audio_content
+
+
+def join_audio_segments(segment_paths: list, output_path: str) -> str:
+    if output_path.endswith(".ogg"):
+        raise ValueError("Ogg/Opus segments cannot be joined by concatenation")
+    temp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.part"
+
+    with open(temp_path, "wb") as out_file:
+        if output_path.endswith(".wav"):
+            with wave.open(segment_paths[0], "rb") as first:
+                params = first.getparams()
+            with wave.open(out_file, "wb") as out:
+                out.setparams(params)
+                for path in segment_paths:
+                    with wave.open(path, "rb") as segment:
+                        out.writeframes(segment.readframes(segment.getnframes()))
+        else:
+            for index, path in enumerate(segment_paths):
+                with open(path, "rb") as segment:
+                    audio_content = segment.read()
+                out_file.write(audio_content if index == 0 else _strip_id3_tags(audio_content))
+
+    os.replace(temp_path, output_path)
+    return output_path
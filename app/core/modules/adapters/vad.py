@@ -1,8 +1,86 @@
-import struct
 import math
 import time
+import numpy as np
+from typing import List, Optional, Protocol, Sequence, Tuple, runtime_checkable
+
+from .audio_buffers import RingBuffer
+
+DEFAULT_VOICE_THRESHOLD = 0.02
+DEFAULT_VOICE_RATIO = 0.3
+DEFAULT_FRAME_SAMPLES = 1024
+DEFAULT_SAMPLE_RATE = 16000
+PCM_FULL_SCALE = 32768.0
+
+SPEECH_BAND_HZ = (100.0, 3500.0)
+SPECTRAL_MIN_ENERGY = 0.003
+SPECTRAL_SNR_FACTOR = 3.0
+SPECTRAL_MIN_BAND_RATIO = 0.6
+SPECTRAL_ZCR_RANGE = (0.01, 0.3)
+NOISE_FLOOR_RISE = 0.05
+NOISE_FLOOR_FALL = 0.5
+NOISE_FLOOR_SPEECH_RISE = 0.002
+
+
+def pcm_samples(audio_data) -> np.ndarray:
+    return np.frombuffer(audio_data, dtype=np.int16, count=len(audio_data) // 2)
+
+
+def frame_rms(audio_data, frame_samples: int = DEFAULT_FRAME_SAMPLES) -> np.ndarray:
+    samples = pcm_samples(audio_data)
+    frame_count = samples.size // frame_samples
+    frames = samples[:frame_count * frame_samples].reshape(frame_count, frame_samples).astype(np.float32)
+    return np.sqrt(np.einsum('ij,ij->i', frames, frames) / frame_samples) / PCM_FULL_SCALE
+
+
+def has_sufficient_voice_content(audio_data: bytes, threshold: float = DEFAULT_VOICE_THRESHOLD,
+                                 min_ratio: float = DEFAULT_VOICE_RATIO) -> bool:
+    try:
+        levels = frame_rms(audio_data, DEFAULT_FRAME_SAMPLES)
+        if levels.size == 0:
+            return False
+            
+        voice_ratio = np.count_nonzero(levels > threshold) / levels.size
+        return voice_ratio >= min_ratio
+        
+    except Exception as e:
+        print(f"Voice content check error: {e}")
+        return True
+
+
+@runtime_checkable
+class VoiceDetector(Protocol):
+    name: str
+    is_voice_active: bool
+
+    def detect_voice_activity(self, audio_data: bytes, timestamp: Optional[float] = None) -> tuple[bool, bool]: ...
+
+    def detect_voice_activity_batch(self, audio_data, frame_samples: int = DEFAULT_FRAME_SAMPLES,
+                                    timestamps: Optional[Sequence[float]] = None) -> List[Tuple[bool, bool]]: ...
+
+    def reset(self) -> None: ...
+
+
+def frame_features(audio_data, frame_samples: int = DEFAULT_FRAME_SAMPLES,
+                   sample_rate: int = DEFAULT_SAMPLE_RATE) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    samples = pcm_samples(audio_data)
+    frame_count = samples.size // frame_samples
+    frames = samples[:frame_count * frame_samples].reshape(frame_count, frame_samples).astype(np.float32)
+
+    energy = np.sqrt(np.einsum('ij,ij->i', frames, frames) / frame_samples) / PCM_FULL_SCALE
+    zero_crossings = np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1) / (frame_samples - 1)
+
+    power = np.abs(np.fft.rfft(frames * np.hanning(frame_samples).astype(np.float32), axis=1)) ** 2
+    frequencies = np.fft.rfftfreq(frame_samples, 1.0 / sample_rate)
+    band = (frequencies >= SPEECH_BAND_HZ[0]) & (frequencies <= SPEECH_BAND_HZ[1])
+    total_power = power[:, 1:].sum(axis=1)
+    band_ratio = np.divide(power[:, band].sum(axis=1), total_power,
+                           out=np.zeros(frame_count), where=total_power > 0)
+    return energy, zero_crossings, band_ratio
+
 
 class VoiceActivityDetector:
+    name = "energy"
+
     def __init__(self, threshold: float = 0.02, min_duration: float = 1.0, silence_duration: float = 2.0):
         self.threshold = threshold
         self.min_duration = min_duration
@@ -10,51 +88,137 @@ class VoiceActivityDetector:
         self.is_voice_active = False
         self.voice_start_time = 0
         self.last_voice_time = 0
-        self.voice_buffer = []
         self.buffer_size = 10
+        self.voice_buffer = RingBuffer(self.buffer_size)
     
-    def detect_voice_activity(self, audio_data: bytes) -> tuple[bool, bool]:
+    def detect_voice_activity(self, audio_data: bytes, timestamp: Optional[float] = None) -> tuple[bool, bool]:
         try:
-            audio_values = struct.unpack(f'{len(audio_data)//2}h', audio_data)
-            rms = math.sqrt(sum(x*x for x in audio_values) / len(audio_values))
-            normalized_rms = rms / 32768.0 
-            
-            self.voice_buffer.append(normalized_rms)
-            if len(self.voice_buffer) > self.buffer_size:
-                self.voice_buffer.pop(0)
-            
-            avg_rms = sum(self.voice_buffer) / len(self.voice_buffer)
-            
-            current_time = time.time()
-            has_voice = avg_rms > self.threshold
-            
-            if has_voice and len(self.voice_buffer) >= 3:
-                recent_above_threshold = sum(1 for x in self.voice_buffer[-3:] if x > self.threshold)
-                has_voice = recent_above_threshold >= 2
-            
-            if has_voice:
-                if not self.is_voice_active:
-                    self.is_voice_active = True
-                    self.voice_start_time = current_time
-                self.last_voice_time = current_time
+            samples = pcm_samples(audio_data).astype(np.float32)
+            if samples.size == 0:
                 return True, False
-            else:
-                if self.is_voice_active:
-                    if (current_time - self.last_voice_time) > self.silence_duration:
-                        if (self.last_voice_time - self.voice_start_time) > self.min_duration:
-                            self.is_voice_active = False
-                            return False, True
-                        else:
-                            self.is_voice_active = False
-                            return False, False
-                    return False, False
-                return False, False
-                    
+            normalized_rms = math.sqrt(np.dot(samples, samples) / samples.size) / PCM_FULL_SCALE
+            return self.update(normalized_rms, timestamp)
         except Exception as e:
             return True, False
     
+    def detect_voice_activity_batch(self, audio_data, frame_samples: int = DEFAULT_FRAME_SAMPLES,
+                                    timestamps: Optional[Sequence[float]] = None) -> List[Tuple[bool, bool]]:
+        levels = frame_rms(audio_data, frame_samples).tolist()
+        if timestamps is None:
+            timestamps = [time.time()] * len(levels)
+        return [self.update(level, timestamp) for level, timestamp in zip(levels, timestamps)]
+    
+    def update(self, normalized_rms: float, timestamp: Optional[float] = None) -> tuple[bool, bool]:
+        self.voice_buffer.append(normalized_rms)
+        
+        avg_rms = self.voice_buffer.mean()
+        
+        has_voice = avg_rms > self.threshold
+        
+        if has_voice and len(self.voice_buffer) >= 3:
+            recent_above_threshold = sum(1 for x in self.voice_buffer.recent(3) if x > self.threshold)
+            has_voice = recent_above_threshold >= 2
+        
+        return self._endpoint(has_voice, timestamp)
+    
+    def _endpoint(self, has_voice: bool, timestamp: Optional[float] = None) -> tuple[bool, bool]:
+        current_time = time.time() if timestamp is None else timestamp
+        
+        if has_voice:
+            if not self.is_voice_active:
+                self.is_voice_active = True
+                self.voice_start_time = current_time
+            self.last_voice_time = current_time
+            return True, False
+        else:
+            if self.is_voice_active:
+                if (current_time - self.last_voice_time) > self.silence_duration:
+                    if (self.last_voice_time - self.voice_start_time) > self.min_duration:
+                        self.is_voice_active = False
+                        return False, True
+                    else:
+                        self.is_voice_active = False
+                        return False, False
+                return False, False
+            return False, False
+    
     def reset(self) -> None:
         self.is_voice_active = False
         self.voice_start_time = 0
         self.last_voice_time = 0
-        self.voice_buffer = []
+        self.voice_buffer.clear()
+
+
+class SpectralVoiceActivityDetector(VoiceActivityDetector):
+    name = "spectral"
+
+    def __init__(self, threshold: float = SPECTRAL_MIN_ENERGY, min_duration: float = 1.0, silence_duration: float = 2.0,
+                 sample_rate: int = DEFAULT_SAMPLE_RATE, snr_factor: float = SPECTRAL_SNR_FACTOR,
+                 min_band_ratio: float = SPECTRAL_MIN_BAND_RATIO, zcr_range: Tuple[float, float] = SPECTRAL_ZCR_RANGE):
+        super().__init__(threshold, min_duration, silence_duration)
+        self.sample_rate = sample_rate
+        self.snr_factor = snr_factor
+        self.min_band_ratio = min_band_ratio
+        self.zcr_range = zcr_range
+        self.noise_floor = None
+        self.buffer_size = 3
+        self.voice_buffer = RingBuffer(self.buffer_size)
+
+    def detect_voice_activity(self, audio_data: bytes, timestamp: Optional[float] = None) -> tuple[bool, bool]:
+        try:
+            decisions = self.detect_voice_activity_batch(audio_data, len(audio_data) // 2, [timestamp])
+            return decisions[0] if decisions else (True, False)
+        except Exception as e:
+            return True, False
+
+    def detect_voice_activity_batch(self, audio_data, frame_samples: int = DEFAULT_FRAME_SAMPLES,
+                                    timestamps: Optional[Sequence[float]] = None) -> List[Tuple[bool, bool]]:
+        energy, zero_crossings, band_ratio = frame_features(audio_data, frame_samples, self.sample_rate)
+        if timestamps is None:
+            timestamps = [time.time()] * energy.size
+        return [
+            self.update_features(level, zcr, ratio, timestamp)
+            for level, zcr, ratio, timestamp in zip(energy.tolist(), zero_crossings.tolist(), band_ratio.tolist(), timestamps)
+        ]
+
+    def update_features(self, energy: float, zero_crossing_rate: float, band_ratio: float,
+                        timestamp: Optional[float] = None) -> tuple[bool, bool]:
+        if self.noise_floor is None:
+            self.noise_floor = energy
+
+        frame_voiced = (
+            energy > max(self.threshold, self.noise_floor * self.snr_factor)
+            and band_ratio >= self.min_band_ratio
+            and self.zcr_range[0] <= zero_crossing_rate <= self.zcr_range[1]
+        )
+
+        if energy < self.noise_floor:
+            self.noise_floor += NOISE_FLOOR_FALL * (energy - self.noise_floor)
+        else:
+            rise = NOISE_FLOOR_SPEECH_RISE if frame_voiced else NOISE_FLOOR_RISE
+            self.noise_floor += rise * (energy - self.noise_floor)
+
+        self.voice_buffer.append(frame_voiced)
+
+        return self._endpoint(self.voice_buffer.total >= 2, timestamp)
+
+    def reset(self) -> None:
+        super().reset()
+        self.noise_floor = None
+
+
+VAD_DETECTORS = {
+    VoiceActivityDetector.name: VoiceActivityDetector,
+    SpectralVoiceActivityDetector.name: SpectralVoiceActivityDetector,
+}
+
+
+def create_voice_detector(name: Optional[str] = None, threshold: Optional[float] = None,
+                          min_duration: float = 1.0, silence_duration: float = 2.0) -> VoiceDetector:
+    name = (name or VoiceActivityDetector.name).lower()
+    if name not in VAD_DETECTORS:
+        raise ValueError(f"Unknown voice activity detector '{name}'. Available: {', '.join(VAD_DETECTORS)}")
+    detector_class = VAD_DETECTORS[name]
+    if threshold is None:
+        return detector_class(min_duration=min_duration, silence_duration=silence_duration)
+    return detector_class(threshold, min_duration, silence_duration)
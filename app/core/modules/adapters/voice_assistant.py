@@ -7,11 +7,23 @@ from typing import Dict, Any, Optional
 
 from .audio_utils import ThreadSafeCounter, html_to_plain_text
 from .tts_adapter import TTSAdapter
+from .audio_formats import supports_segment_join
+from .tts_admission import AdmissionPolicy, TTSAdmissionError
+from .task_registry import TaskRegistry
+from .timer_wheel import TimerWheel
+from .batch_render import BatchRenderer
+from .stt_providers import create_stt_provider
+from .stt_stream import StreamingTranscriber, transcript_words
+from .vad import create_voice_detector
 from app.core.modules.adapters.tts import RealTimeTTS
+from app.Config import ENV_SETTINGS
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PREFETCH_MAX_ENTRIES = 256
+PREFETCH_GROWTH_FACTOR = 1.5
+
 class VoiceAssistant:
     def __init__(self, language_processor, max_concurrent_requests: int = 5):
         self.language_processor = language_processor
@@ -21,22 +33,42 @@ class VoiceAssistant:
             max_workers=max_concurrent_requests,
             thread_name_prefix="VoiceAssistant"
         )
-        self.active_requests = {}
+        self.active_requests = TaskRegistry(ENV_SETTINGS.TASK_REGISTRY_TTL_SECONDS, ENV_SETTINGS.TASK_REGISTRY_MAX_ENTRIES)
         self.request_counter = ThreadSafeCounter()
         self.request_lock = threading.RLock()
         self.shutdown_event = threading.Event()
         
-        self.tts_instance = RealTimeTTS(language="English", speaker="Jenny")
+        self.timer_wheel = TimerWheel()
+        self.tts_instance = RealTimeTTS(language="English", speaker="Jenny", max_workers=ENV_SETTINGS.TTS_MAX_WORKERS,
+                                        timer_wheel=self.timer_wheel)
         self.tts_instance.enable_auto_language_detection(True)
-        self.tts_adapter = TTSAdapter(self.tts_instance, max_workers=3)
+        self.tts_adapter = TTSAdapter(
+            self.tts_instance,
+            max_workers=ENV_SETTINGS.TTS_MAX_WORKERS,
+            max_queue_size=ENV_SETTINGS.TTS_MAX_QUEUE_SIZE,
+            aging_interval=ENV_SETTINGS.TTS_QUEUE_AGING_SECONDS,
+            task_ttl_seconds=ENV_SETTINGS.TASK_REGISTRY_TTL_SECONDS,
+            max_task_entries=ENV_SETTINGS.TASK_REGISTRY_MAX_ENTRIES,
+            admission_policy=AdmissionPolicy(ENV_SETTINGS.TTS_ADMISSION_POLICY),
+            admission_max_wait=ENV_SETTINGS.TTS_ADMISSION_MAX_WAIT_SECONDS,
+            timer_wheel=self.timer_wheel
+        )
         self.tts_adapter.add_completion_callback(self._on_tts_completion)
+        self.batch_renderer = BatchRenderer(self.tts_instance, concurrency=ENV_SETTINGS.TTS_BATCH_CONCURRENCY)
+        self.stt_provider = None
+        self.stt_lock = threading.Lock()
+        self.transcription_streams = set()
+        self.prefetched_context = TaskRegistry(ENV_SETTINGS.STT_PREFETCH_TTL_SECONDS, PREFETCH_MAX_ENTRIES,
+                                               on_discard=self._cancel_prefetch)
+        self.prefetch_stats = {'started': 0, 'used': 0, 'failed': 0, 'cancelled': 0}
         
 
     
     def _on_tts_completion(self, task_id: str, audio_path: str):
         pass
         
-    async def _process_transcription_task(self, request_id: str, transcription: str, include_audio: bool) -> dict:
+    async def _process_transcription_task(self, request_id: str, transcription: str, include_audio: bool,
+                                          audio_format: Optional[str] = None) -> dict:
         try:
 
             
@@ -46,7 +78,8 @@ class VoiceAssistant:
                 user_input=transcription,
                 context=self.conversation_context.copy(),
                 use_web_context=True,
-                max_web_results=3
+                max_web_results=3,
+                web_context=await self._take_prefetched_context(transcription)
             )
             
 
@@ -65,13 +98,26 @@ class VoiceAssistant:
                 try:
                     audio_start_time = time.time()
                     tts_text = html_to_plain_text(response_text)
-                    audio_file_path = await self.tts_adapter.speak_text(tts_text, priority=1, timeout=20.0)
+                    if (ENV_SETTINGS.TTS_SEGMENTED_SYNTHESIS and len(tts_text) >= ENV_SETTINGS.TTS_SEGMENTED_MIN_TEXT_CHARS
+                            and supports_segment_join(audio_format)):
+                        audio_file_path = await self.tts_adapter.speak_text_segmented(tts_text, timeout=20.0,
+                                                                                   audio_format=audio_format)
+                    else:
+                        audio_file_path = await self.tts_adapter.speak_text(tts_text, priority=1, timeout=20.0,
+                                                                         audio_format=audio_format)
                     
                     result["audio_file"] = audio_file_path or ""
+                    result["audio_status"] = "ready" if audio_file_path else "failed"
                     
+                except TTSAdmissionError as admission:
+                    logger.warning(f"Request {request_id}: {admission}")
+                    result["audio_file"] = ""
+                    result["audio_status"] = admission.status
+                    result["audio_admission"] = admission.to_dict()
                 except Exception as tts_error:
                     logger.error(f"Request {request_id}: TTS Error: {tts_error}")
                     result["audio_file"] = ""
+                    result["audio_status"] = "failed"
                     result["tts_error"] = str(tts_error)
             
 
@@ -80,13 +126,13 @@ class VoiceAssistant:
             
         except Exception as e:
             logger.error(f"Request {request_id}: Error in transcription processing: {str(e)}")
-            error_response = "I apologize, but I encountered an error processing your request."
+            error_response = ENV_SETTINGS.PHRASE_BANK["assistant_error"]
             
             result = {"text": error_response, "error": str(e)}
             
             if include_audio:
                 try:
-                    audio_file_path = await self.tts_adapter.speak_text(error_response, priority=2)
+                    audio_file_path = await self.tts_adapter.speak_text(error_response, priority=2, audio_format=audio_format)
                     result["audio_file"] = audio_file_path or ""
                 except Exception as tts_error:
                     logger.error(f"Request {request_id}: TTS Error in error handling: {tts_error}")
@@ -96,16 +142,16 @@ class VoiceAssistant:
         
         finally:
             with self.request_lock:
-                if request_id in self.active_requests:
-                    del self.active_requests[request_id]
+                self.active_requests.pop(request_id, None)
     
-    async def handle_transcription_with_audio_async(self, transcription: str) -> str:
-        return await self._handle_transcription_async(transcription, include_audio=True)
+    async def handle_transcription_with_audio_async(self, transcription: str, audio_format: Optional[str] = None) -> str:
+        return await self._handle_transcription_async(transcription, include_audio=True, audio_format=audio_format)
     
     async def handle_transcription_only_async(self, transcription: str) -> str:
         return await self._handle_transcription_async(transcription, include_audio=False)
     
-    async def _handle_transcription_async(self, transcription: str, include_audio: bool) -> str:
+    async def _handle_transcription_async(self, transcription: str, include_audio: bool,
+                                          audio_format: Optional[str] = None) -> str:
         if self.shutdown_event.is_set():
             raise Exception("VoiceAssistant is shutting down")
         
@@ -115,7 +161,8 @@ class VoiceAssistant:
             self._process_transcription_task(
                 request_id,
                 transcription,
-                include_audio
+                include_audio,
+                audio_format
             )
         )
         
@@ -124,6 +171,7 @@ class VoiceAssistant:
                 'task': task,
                 'transcription': transcription,
                 'include_audio': include_audio,
+                'audio_format': audio_format,
                 'start_time': time.time()
             }
         
@@ -132,40 +180,187 @@ class VoiceAssistant:
     
     async def get_request_result(self, request_id: str, timeout: float = 30.0) -> Optional[dict]:
         with self.request_lock:
-            if request_id not in self.active_requests:
+            request = self.active_requests.get(request_id)
+            if request is None:
                 logger.warning(f"Request {request_id} not found")
                 return None
             
-            task = self.active_requests[request_id]['task']
+            task = request['task']
+            include_audio = request['include_audio']
+            audio_format = request.get('audio_format')
         
         try:
             result = await asyncio.wait_for(task, timeout=timeout)
             return result
         except asyncio.TimeoutError:
             logger.error(f"Request {request_id} timed out after {timeout}s")
-            return {"text": "Request timed out", "error": "timeout"}
+            result = {"text": ENV_SETTINGS.PHRASE_BANK["request_timeout"], "error": "timeout"}
+            if include_audio:
+                phrase = self.tts_instance.phrase_bank.lookup(result["text"], audio_format=audio_format)
+                result["audio_file"] = phrase.path if phrase else ""
+            return result
         except Exception as e:
             logger.error(f"Request {request_id} failed: {str(e)}")
             return {"text": "Request failed", "error": str(e)}
     
-    async def handle_transcription_with_audio(self, transcription: str) -> dict:
-        request_id = await self.handle_transcription_with_audio_async(transcription)
+    async def handle_transcription_with_audio(self, transcription: str, audio_format: Optional[str] = None) -> dict:
+        request_id = await self.handle_transcription_with_audio_async(transcription, audio_format=audio_format)
         return await self.get_request_result(request_id) or {"text": "Processing failed", "audio_file": ""}
     
     async def handle_transcription_only(self, transcription: str) -> dict:
         request_id = await self.handle_transcription_only_async(transcription)
         return await self.get_request_result(request_id) or {"text": "Processing failed"}
     
+    def bind_event_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.tts_instance.bind_event_loop(loop)
+    
+    async def aclose(self) -> None:
+        await self.tts_instance.aclose()
+        if self.stt_provider is not None:
+            await self.stt_provider.aclose()
+    
+    def warm_phrase_bank(self) -> None:
+        if ENV_SETTINGS.PHRASE_BANK_ENABLED:
+            self.tts_instance.phrase_bank.start_warmup(ENV_SETTINGS.PHRASE_BANK, ENV_SETTINGS.PHRASE_BANK_VOICES)
+    
+    def get_phrase_audio(self, name: str):
+        return self.tts_instance.phrase_bank.get_phrase(name)
+    
+    def get_pinned_audio_files(self) -> list:
+        pinned = self.tts_instance.phrase_bank.get_pinned_files()
+        if self.tts_instance.audio_cache:
+            pinned.extend(self.tts_instance.audio_cache.get_pinned_files())
+        return pinned
+    
+    def admit_speech_stream(self) -> None:
+        self.tts_adapter.admit_stream()
+    
+    def stream_speech(self, text: str, on_complete=None, audio_format: Optional[str] = None):
+        return self.tts_adapter.track_stream(
+            self.tts_instance.stream_text(html_to_plain_text(text), on_complete=on_complete, audio_format=audio_format)
+        )
+    
+    def get_stt_provider(self):
+        with self.stt_lock:
+            if self.stt_provider is None:
+                self.stt_provider = create_stt_provider(ENV_SETTINGS.STT_PROVIDER)
+            return self.stt_provider
+    
+    def open_transcription_stream(self, encoding: str, interim: bool = True) -> StreamingTranscriber:
+        detector = create_voice_detector(
+            ENV_SETTINGS.STT_VAD_DETECTOR,
+            ENV_SETTINGS.STT_VAD_THRESHOLD,
+            ENV_SETTINGS.STT_VAD_MIN_SPEECH_SECONDS,
+            ENV_SETTINGS.STT_VAD_SILENCE_SECONDS
+        )
+        stream = StreamingTranscriber(
+            self.get_stt_provider(),
+            encoding=encoding,
+            detector=detector,
+            max_utterance_seconds=ENV_SETTINGS.STT_MAX_UTTERANCE_SECONDS,
+            pre_roll_seconds=ENV_SETTINGS.STT_PRE_ROLL_SECONDS,
+            max_in_flight=ENV_SETTINGS.STT_MAX_IN_FLIGHT,
+            interim_interval_seconds=ENV_SETTINGS.STT_INTERIM_INTERVAL_SECONDS if interim else None
+        )
+        with self.stt_lock:
+            self.transcription_streams.add(stream)
+        return stream
+    
+    def close_transcription_stream(self, stream: StreamingTranscriber) -> None:
+        with self.stt_lock:
+            self.transcription_streams.discard(stream)
+    
+    def prefetch_for_prefix(self, prefix: str, previous_prefix: str = "") -> bool:
+        words = transcript_words(prefix)
+        if self.shutdown_event.is_set() or len(words) < (ENV_SETTINGS.STT_PREFETCH_MIN_WORDS or 1):
+            return False
+        if len(words) < len(transcript_words(previous_prefix)) * PREFETCH_GROWTH_FACTOR:
+            return False
+        key = " ".join(words)
+        if key in self.prefetched_context:
+            return False
+        task = asyncio.ensure_future(self.language_processor.prefetch_web_context(prefix))
+        task.add_done_callback(self._consume_prefetch_result)
+        self.prefetched_context[key] = task
+        with self.request_lock:
+            self.prefetch_stats['started'] += 1
+        return True
+    
+    def _cancel_prefetch(self, task: asyncio.Future) -> None:
+        if not task.done():
+            task.get_loop().call_soon_threadsafe(task.cancel)
+            with self.request_lock:
+                self.prefetch_stats['cancelled'] += 1
+    
+    @staticmethod
+    def _consume_prefetch_result(task: asyncio.Future) -> None:
+        if not task.cancelled():
+            task.exception()
+    
+    async def _take_prefetched_context(self, transcription: str) -> Optional[str]:
+        words = transcript_words(transcription)
+        min_words = len(words) * (ENV_SETTINGS.STT_PREFETCH_MIN_COVERAGE or 1.0)
+        best = None
+        for key in self.prefetched_context.keys():
+            prefix = key.split()
+            if len(prefix) >= min_words and words[:len(prefix)] == prefix and (best is None or len(key) > len(best)):
+                best = key
+        task = self.prefetched_context.pop(best) if best else None
+        if task is None:
+            return None
+        
+        try:
+            context = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            return None
+        except Exception as e:
+            logger.warning(f"Prefetched web context for '{best}' failed: {e}")
+            with self.request_lock:
+                self.prefetch_stats['failed'] += 1
+            return None
+        with self.request_lock:
+            self.prefetch_stats['used'] += 1
+        return context
+    
+    def get_stt_stats(self) -> Dict[str, Any]:
+        with self.stt_lock:
+            streams = list(self.transcription_streams)
+            provider = self.stt_provider.name if self.stt_provider is not None else None
+        return {'provider': provider, 'active_streams': [stream.get_stats() for stream in streams]}
+    
+    def check_batch_job(self, job_id: str) -> str:
+        return self.batch_renderer.check(job_id)
+    
+    def render_batch(self, lines: list, job_id: Optional[str] = None, concurrency: Optional[int] = None):
+        return self.batch_renderer.run(lines, job_id=job_id, concurrency=concurrency)
+    
+    def get_batch_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.batch_renderer.get_status(job_id)
+    
+    def get_tts_metrics(self) -> Dict[str, Any]:
+        return {
+            'stages': self.tts_instance.get_stage_metrics(),
+            'queue': self.tts_adapter.get_queue_metrics(),
+            'hedging': self.tts_instance.get_hedging_stats(),
+        }
+    
+    def get_audio_media_type(self, text: Optional[str] = None, audio_format: Optional[str] = None) -> str:
+        voice = self.tts_instance.resolve_voice_params(html_to_plain_text(text), audio_format=audio_format) if text else None
+        return self.tts_instance.get_media_type(voice)
+    
     def get_active_request_count(self) -> int:
         with self.request_lock:
             return len(self.active_requests)
     
     def get_request_status(self, request_id: str) -> Optional[str]:
         with self.request_lock:
-            if request_id not in self.active_requests:
+            request = self.active_requests.get(request_id)
+            if request is None:
                 return None
             
-            task = self.active_requests[request_id]['task']
+            task = request['task']
             
             if task.done():
                 if task.exception():
@@ -177,14 +372,15 @@ class VoiceAssistant:
     
     def cancel_request(self, request_id: str) -> bool:
         with self.request_lock:
-            if request_id not in self.active_requests:
+            request = self.active_requests.get(request_id)
+            if request is None:
                 return False
             
-            task = self.active_requests[request_id]['task']
+            task = request['task']
             success = task.cancel()
             
             if success:
-                del self.active_requests[request_id]
+                self.active_requests.pop(request_id, None)
             
             return success            
         
@@ -203,6 +399,7 @@ class VoiceAssistant:
                 self.cancel_request(request_id)
         
         self.tts_adapter.stop()
+        self.timer_wheel.stop()
         
         self.executor.shutdown(wait=True)
     
@@ -217,6 +414,20 @@ class VoiceAssistant:
                 'total_requests_processed': self.request_counter._value,
                 'tts_queue_size': self.tts_adapter.get_queue_size(),
                 'tts_active_tasks': self.tts_adapter.get_active_task_count(),
+                'tts_queue': self.tts_adapter.get_queue_metrics(),
+                'tts_cache': self.tts_instance.get_cache_stats(),
+                'tts_coalescing': self.tts_instance.get_coalescing_stats(),
+                'tts_hedging': self.tts_instance.get_hedging_stats(),
+                'tts_voices': self.tts_instance.get_voices(),
+                'phrase_bank': self.tts_instance.phrase_bank.get_stats(),
+                'timer_wheel': self.timer_wheel.get_stats(),
+                'tts_stages': self.tts_instance.get_stage_metrics(),
+                'stt_streams': self.get_stt_stats(),
+                'stt_prefetch': {**self.prefetch_stats, **self.prefetched_context.get_stats()},
+                'task_registries': {
+                    'active_requests': self.active_requests.get_stats(),
+                    **self.tts_instance.get_task_registry_stats()
+                },
                 'is_running': not self.shutdown_event.is_set()
             }
         return stats
@@ -93,14 +93,16 @@ class LanguageProcessor:
     
     async def process_query(self, user_input: str, context: Optional[Dict[str, Any]] = None,
                      force_language: Optional[str] = None,
-                     use_web_context: bool = True, max_web_results: int = 3) -> str:
+                     use_web_context: bool = True, max_web_results: int = 3,
+                     web_context: Optional[str] = None) -> str:
         try:
             if self.response_language == "auto" and not force_language:
                 current_language = detect_input_language(user_input)
             else:
                 current_language = force_language or self.response_language
 
-            web_context = await self._get_web_context(user_input, use_web_context, max_web_results)
+            if web_context is None:
+                web_context = await self._get_web_context(user_input, use_web_context, max_web_results)
             
             formatted_input = self._format_input(user_input, context, current_language, web_context)
             
@@ -225,11 +227,11 @@ class LanguageProcessor:
 
         
         if current_language == "hindi":
-            return "क्षमा करें, आपके अनुरोध को प्रोसेस करने में त्रुटि हुई है। कृपया पुनः प्रयास करें।"
+            return ENV_SETTINGS.PHRASE_BANK["llm_error_hindi"]
         elif current_language == "hinglish":
-            return "Sorry, आपके request को process करने में error हुई है। Please फिर से try करें।"
+            return ENV_SETTINGS.PHRASE_BANK["llm_error_hinglish"]
         else:
-            return "I apologize, but I encountered an error while processing your request. Please try again."
+            return ENV_SETTINGS.PHRASE_BANK["llm_error_english"]
     
     def set_mixed_language_mode(self, allow_mixed: bool) -> None:
         self.allow_mixed_language = allow_mixed
@@ -287,6 +289,9 @@ class LanguageProcessor:
         kwargs['max_web_results'] = 1
         return await self.process_query(user_input, **kwargs)
     
+    async def prefetch_web_context(self, user_input: str, max_results: int = 3) -> str:
+        return await self._get_web_context(user_input, True, max_results)
+
     async def get_web_context_for_query(self, user_input: str, max_results: int = 3) -> Dict[str, Any]:
         if not self.use_web_scraper or not self.web_scraper:
             return {"success": False, "error": "Web scraper not available"}
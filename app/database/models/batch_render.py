@@ -0,0 +1,16 @@
+from typing import List, Optional, Union
+from pydantic import BaseModel, Field
+
+
+class BatchRenderLine(BaseModel):
+    text: str
+    language: Optional[str] = None
+    speaker: Optional[str] = None
+
+
+class BatchRenderReq(BaseModel):
+    lines: List[Union[str, BatchRenderLine]]
+    job_id: Optional[str] = Field(None, pattern=r"^[A-Za-z0-9_-]{1,64}$")
+    language: Optional[str] = None
+    speaker: Optional[str] = None
+    concurrency: Optional[int] = Field(None, ge=1)
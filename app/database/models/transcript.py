@@ -1,5 +1,8 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class TranscriptReq(BaseModel):
     transcript : str
     session_id: str
+    stream_audio: bool = False
+    audio_format: Optional[str] = None
@@ -1,5 +1,6 @@
 import os
 import time
+import heapq
 from typing import Dict, Optional, Any
 
 
@@ -25,6 +26,9 @@ class SessionRepository:
     def get_all_session_ids(self) -> list:
         return list(self.session_responses.keys())
     
+    def get_referenced_audio_files(self) -> list:
+        return [data.get("audio_file", "") for data in list(self.session_responses.values())]
+    
     def get_audio_file_path(self, session_id: str) -> str:
         session_data = self.session_responses.get(session_id)
         return session_data.get("audio_file", "") if session_data else ""
@@ -140,16 +144,15 @@ class SessionRepository:
         static_audio_dir = os.path.join("static", "audio")
         if os.path.exists(static_audio_dir):
             try:
-                files = os.listdir(static_audio_dir)
+                with os.scandir(static_audio_dir) as it:
+                    files = [entry for entry in it if entry.is_file()]
                 debug_info["static_directory"] = {
                     "path": static_audio_dir,
                     "exists": True,
                     "file_count": len(files),
-                    "recent_files": sorted(
-                        files, 
-                        key=lambda x: os.path.getmtime(os.path.join(static_audio_dir, x)), 
-                        reverse=True
-                    )[:5]
+                    "recent_files": [
+                        entry.name for entry in heapq.nlargest(5, files, key=lambda entry: entry.stat().st_mtime)
+                    ]
                 }
             except Exception as e:
                 debug_info["static_directory"] = {
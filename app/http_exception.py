@@ -34,5 +34,6 @@ class CustomHTTPException(HTTPException):
 async def http_error_handler(_: Request, exc: HTTPException):
     return ORJSONResponse(
         status_code=exc.status_code,
-        content={"detail": exc.detail}
+        content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None)
     )
\ No newline at end of file
@@ -1,4 +1,5 @@
 import time
+import asyncio
 from fastapi import FastAPI, status, HTTPException
 from fastapi.responses import ORJSONResponse
 from starlette.requests import Request
@@ -8,7 +9,9 @@ from app.http_exception import http_error_handler
 from app.schema.health import Health_Schema
 from app.utils.uptime import getUptime
 from app.routes.api.routers import routers
-from app.routes.api.v1.voice_assistant import set_assistant
+from app.routes.api.v1.voice_assistant import set_assistant, get_assistant, set_audio_janitor
+from app.core.modules.adapters.audio_janitor import AudioJanitor
+from app.database.repositories.session_repository import session_repo
 from app.database import supabase
 from app.core.app_configure import configure_database, configure_logging, configure_middleware
 import os
@@ -39,12 +42,36 @@ async def startup_event():
         from app.core.assistant.voice_assistant import IntegratedVoiceAssistant
         integrated_assistant = IntegratedVoiceAssistant()
         assistant_instance = integrated_assistant.get_voice_assistant()
+        assistant_instance.bind_event_loop(asyncio.get_running_loop())
         set_assistant(assistant_instance)
+        assistant_instance.warm_phrase_bank()
+        
+        audio_janitor = AudioJanitor(
+            max_bytes=ENV_SETTINGS.AUDIO_RETENTION_MAX_BYTES,
+            max_age_seconds=ENV_SETTINGS.AUDIO_RETENTION_MAX_AGE_SECONDS,
+            max_files=ENV_SETTINGS.AUDIO_RETENTION_MAX_FILES,
+            interval_seconds=ENV_SETTINGS.AUDIO_JANITOR_INTERVAL_SECONDS,
+            batch_size=ENV_SETTINGS.AUDIO_JANITOR_BATCH_SIZE
+        )
+        audio_janitor.add_pin_source(session_repo.get_referenced_audio_files)
+        audio_janitor.add_pin_source(assistant_instance.get_pinned_audio_files)
+        audio_janitor.start()
+        set_audio_janitor(audio_janitor)
     except ImportError as e:
         sys.exit(1)
     except Exception as e:
         sys.exit(1)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    from app.routes.api.v1.voice_assistant import audio_janitor
+    if audio_janitor:
+        await audio_janitor.stop()
+    
+    assistant_instance = get_assistant()
+    if assistant_instance:
+        await assistant_instance.aclose()
+
 @app.get("/health",response_class=ORJSONResponse, response_model=Health_Schema, tags=["Health Route"])
 async def health_check(request: Request, response: Response):
     database_connected = False
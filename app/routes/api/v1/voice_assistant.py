@@ -1,15 +1,26 @@
 ﻿import os
+import json
+import math
 import time
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse, ORJSONResponse
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, ORJSONResponse, Response, StreamingResponse
 from loguru import logger
 
+from app.Config import ENV_SETTINGS
+from app.core.modules.adapters.audio_formats import media_type_for_path, negotiate_audio_format
+from app.core.modules.adapters.batch_render import BatchJobConflict, BatchLine, BatchRenderer
+from app.core.modules.adapters.stt_stream import PCM_ENCODING
+from app.core.modules.adapters.tts_admission import TTSAdmissionError
+from app.database.models.batch_render import BatchRenderReq
 from app.database.models.transcript import TranscriptReq
 from app.database.repositories.session_repository import session_repo
 
 voice_assistant_logger = logger
 voice_assistant_router = APIRouter()
 assistant = None
+audio_janitor = None
 
 
 def set_assistant(assistant_instance):
@@ -18,54 +29,81 @@ def set_assistant(assistant_instance):
     voice_assistant_logger.info("Voice assistant instance set successfully")
 
 
+def set_audio_janitor(janitor_instance):
+    global audio_janitor
+    audio_janitor = janitor_instance
+
+
 def get_assistant():
     return assistant
 
 
+def resolve_audio_format(request: Request, requested: Optional[str] = None) -> Optional[str]:
+    try:
+        return negotiate_audio_format(request.headers.get("accept"), requested)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def respond_to_transcript(session_id: str, transcript: str, stream_audio: bool = False,
+                                audio_format: Optional[str] = None) -> dict:
+    assistant_start_time = time.time()
+    if stream_audio:
+        result = await assistant.handle_transcription_only(transcript)
+    else:
+        result = await assistant.handle_transcription_with_audio(transcript, audio_format=audio_format)
+    assistant_end_time = time.time()
+    assistant_processing_time = assistant_end_time - assistant_start_time
+    
+    response_text = result.get("text", "")
+    audio_file_path = result.get("audio_file", "")
+    audio_status = result.get("audio_status", "streaming" if stream_audio else "")
+    stream_audio_url = f"/stream-audio/{session_id}" + (f"?format={audio_format}" if audio_format else "")
+
+    if audio_file_path:
+        audio_file_path = session_repo.normalize_audio_path(audio_file_path)
+        actual_audio_path = session_repo.find_audio_file(audio_file_path)
+        if actual_audio_path:
+            audio_file_path = actual_audio_path
+        else:
+            audio_file_path = ""
+
+    session_repo.store_session_response(session_id, response_text, audio_file_path)
+    audio_urls = session_repo.get_audio_urls(session_id, audio_file_path)
+
+    return {
+        "success": True,
+        "text": response_text,
+        "audio_file": audio_file_path,
+        "audio_url": audio_urls["audio_url"],
+        "static_audio_url": audio_urls["static_audio_url"],
+        "stream_audio_url": stream_audio_url if stream_audio and response_text else "",
+        "audio_status": audio_status,
+        "audio_admission": result.get("audio_admission"),
+        "audio_filename": os.path.basename(audio_file_path) if audio_file_path else "",
+        "products": [],
+        "message": "Generated response based on transcript",
+        "execution_time": {
+            "assistant_processing_time": assistant_processing_time
+        }
+    }
+
+
 @voice_assistant_router.post("/start-assistant/", response_class=ORJSONResponse)
-async def start_assistant(data: TranscriptReq):
+async def start_assistant(data: TranscriptReq, request: Request, format: Optional[str] = None):
     start_time = time.time()
 
     if not assistant:
         raise HTTPException(status_code=500, detail="Assistant not initialized")
 
+    audio_format = resolve_audio_format(request, format or data.audio_format)
+
     try:
-        assistant_start_time = time.time()
-        result = await assistant.handle_transcription_with_audio(data.transcript)
-        assistant_end_time = time.time()
-        assistant_processing_time = assistant_end_time - assistant_start_time
-        
-        response_text = result.get("text", "")
-        audio_file_path = result.get("audio_file", "")
-
-        if audio_file_path:
-            audio_file_path = session_repo.normalize_audio_path(audio_file_path)
-            actual_audio_path = session_repo.find_audio_file(audio_file_path)
-            if actual_audio_path:
-                audio_file_path = actual_audio_path
-            else:
-                audio_file_path = ""
-
-        session_repo.store_session_response(data.session_id, response_text, audio_file_path)
-        audio_urls = session_repo.get_audio_urls(data.session_id, audio_file_path)
+        response = await respond_to_transcript(data.session_id, data.transcript, data.stream_audio, audio_format)
 
         end_time = time.time()
-        total_execution_time = end_time - start_time
-
-        return {
-            "success": True,
-            "text": response_text,
-            "audio_file": audio_file_path,
-            "audio_url": audio_urls["audio_url"],
-            "static_audio_url": audio_urls["static_audio_url"],
-            "audio_filename": os.path.basename(audio_file_path) if audio_file_path else "",
-            "products": [],
-            "message": "Generated response based on transcript",
-            "execution_time": {
-                "assistant_processing_time": assistant_processing_time,
-                "total_execution_time": total_execution_time
-            }
-        }
+        response["execution_time"]["total_execution_time"] = end_time - start_time
+        return response
 
     except Exception as e:
         end_time = time.time()
@@ -74,6 +112,154 @@ async def start_assistant(data: TranscriptReq):
         raise HTTPException(status_code=500, detail=f"Failed to start assistant: {e}")
 
 
+@voice_assistant_router.websocket("/transcribe-stream/{session_id}")
+async def transcribe_stream(websocket: WebSocket, session_id: str, encoding: str = PCM_ENCODING,
+                            stream_audio: bool = False, format: Optional[str] = None, interim: bool = True):
+    await websocket.accept()
+
+    if not assistant:
+        await websocket.close(code=1011, reason="Assistant not initialized")
+        return
+
+    try:
+        audio_format = negotiate_audio_format(None, format)
+        transcriber = assistant.open_transcription_stream(encoding, interim=interim)
+    except (ValueError, RuntimeError) as e:
+        await websocket.close(code=1003, reason=str(e))
+        return
+
+    disconnected = asyncio.Event()
+
+    async def receive_audio():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    disconnected.set()
+                    break
+                if message.get("bytes"):
+                    for event in transcriber.feed(message["bytes"]):
+                        await websocket.send_json({"type": event})
+                elif message.get("text"):
+                    try:
+                        control = json.loads(message["text"]).get("type")
+                    except (ValueError, AttributeError):
+                        control = None
+                    if control == "end":
+                        break
+                    if control == "flush":
+                        transcriber.flush()
+                    else:
+                        await websocket.send_json({"type": "error", "detail": f"Unknown control message: {message['text']}"})
+        except Exception as e:
+            if not disconnected.is_set():
+                voice_assistant_logger.error(f"Transcription stream for session {session_id} failed: {e}")
+            disconnected.set()
+        finally:
+            transcriber.close()
+
+    receiver = asyncio.create_task(receive_audio())
+    try:
+        await websocket.send_json({"type": "ready", "session_id": session_id, "encoding": encoding,
+                                   "sample_rate": transcriber.sample_rate})
+        prefetched = (0, "")
+        async for hypothesis in transcriber.transcripts():
+            if disconnected.is_set():
+                break
+            sequence = hypothesis.sequence
+            if not hypothesis.final:
+                await websocket.send_json({"type": "interim", "sequence": sequence, "text": hypothesis.text,
+                                           "stable_text": hypothesis.stable_text,
+                                           "audio_seconds": hypothesis.audio_seconds})
+                previous_prefix = prefetched[1] if prefetched[0] == sequence else ""
+                if assistant.prefetch_for_prefix(hypothesis.stable_text, previous_prefix):
+                    prefetched = (sequence, hypothesis.stable_text)
+                continue
+            await websocket.send_json({"type": "transcript", "sequence": sequence, "text": hypothesis.text,
+                                       "audio_seconds": hypothesis.audio_seconds})
+            try:
+                response = await respond_to_transcript(session_id, hypothesis.text, stream_audio, audio_format)
+            except Exception as e:
+                voice_assistant_logger.error(f"Assistant failed for streamed transcript in session {session_id}: {e}")
+                await websocket.send_json({"type": "error", "sequence": sequence, "detail": str(e)})
+                continue
+            await websocket.send_json({"type": "response", "sequence": sequence, **response})
+    except (WebSocketDisconnect, RuntimeError):
+        disconnected.set()
+    finally:
+        receiver.cancel()
+        assistant.close_transcription_stream(transcriber)
+
+    if not disconnected.is_set():
+        await websocket.send_json({"type": "complete", **transcriber.get_stats()})
+        await websocket.close()
+
+
+@voice_assistant_router.get("/stream-audio/{session_id}")
+async def stream_audio(session_id: str, request: Request, format: Optional[str] = None):
+    if not assistant:
+        raise HTTPException(status_code=500, detail="Assistant not initialized")
+
+    audio_format = resolve_audio_format(request, format)
+
+    if not session_repo.session_exists(session_id):
+        raise HTTPException(status_code=404, detail="No response available for this session ID")
+
+    response_text = session_repo.get_session_response(session_id).get("text", "")
+    if not response_text:
+        raise HTTPException(status_code=404, detail="No response text to synthesize for this session")
+
+    try:
+        assistant.admit_speech_stream()
+    except TTSAdmissionError as admission:
+        voice_assistant_logger.warning(f"Audio stream for session {session_id} refused: {admission}")
+        raise HTTPException(status_code=503, detail=admission.to_dict(),
+                            headers={"Retry-After": str(max(1, math.ceil(admission.retry_after)))})
+
+    def on_complete(audio_file_path):
+        session_repo.store_session_response(
+            session_id, response_text, session_repo.normalize_audio_path(audio_file_path)
+        )
+
+    async def audio_chunks():
+        try:
+            async for chunk in assistant.stream_speech(response_text, on_complete=on_complete, audio_format=audio_format):
+                yield chunk
+        except Exception as e:
+            voice_assistant_logger.error(f"Audio stream for session {session_id} failed: {e}")
+            raise
+
+    return StreamingResponse(
+        audio_chunks(),
+        media_type=assistant.get_audio_media_type(response_text, audio_format=audio_format),
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate, max-age=0",
+            "X-Content-Type-Options": "nosniff",
+            "Access-Control-Allow-Origin": "*"
+        }
+    )
+
+
+@voice_assistant_router.get("/phrase-audio/{phrase_name}")
+async def get_phrase_audio(phrase_name: str):
+    if not assistant:
+        raise HTTPException(status_code=500, detail="Assistant not initialized")
+
+    phrase = assistant.get_phrase_audio(phrase_name)
+    if not phrase:
+        raise HTTPException(status_code=404, detail=f"Phrase '{phrase_name}' is not available")
+
+    return Response(
+        content=phrase.audio,
+        media_type=media_type_for_path(phrase.path),
+        headers={
+            "Cache-Control": "public, max-age=3600",
+            "X-Content-Type-Options": "nosniff",
+            "Access-Control-Allow-Origin": "*"
+        }
+    )
+
+
 @voice_assistant_router.post("/get-transcript", response_class=ORJSONResponse)
 async def get_transcript(data: TranscriptReq):
     start_time = time.time()
@@ -117,11 +303,12 @@ async def get_audio_file(session_id: str):
 
     return FileResponse(
         path=audio_file_path,
-        media_type="audio/wav",
+        media_type=media_type_for_path(audio_file_path),
         filename=os.path.basename(audio_file_path),
         headers={
             "Content-Disposition": f"inline; filename={os.path.basename(audio_file_path)}",
             "Cache-Control": "no-cache, no-store, must-revalidate, max-age=0",
+            "X-Content-Type-Options": "nosniff",
             "Access-Control-Allow-Origin": "*"
         }
     )
@@ -149,6 +336,76 @@ async def get_latest_response(session_id: str):
     }
 
 
+@voice_assistant_router.get("/audio-retention", response_class=ORJSONResponse)
+async def audio_retention_stats():
+    if not audio_janitor:
+        raise HTTPException(status_code=404, detail="Audio retention is not enabled")
+    return audio_janitor.get_metrics()
+
+
+@voice_assistant_router.post("/batch-render")
+async def batch_render(data: BatchRenderReq, request: Request, format: Optional[str] = None):
+    if not assistant:
+        raise HTTPException(status_code=500, detail="Assistant not initialized")
+
+    if not data.lines:
+        raise HTTPException(status_code=400, detail="No lines to render")
+    if len(data.lines) > ENV_SETTINGS.TTS_BATCH_MAX_LINES:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {ENV_SETTINGS.TTS_BATCH_MAX_LINES} lines")
+
+    lines = [
+        BatchLine(line, data.language, data.speaker) if isinstance(line, str)
+        else BatchLine(line.text, line.language or data.language, line.speaker or data.speaker)
+        for line in data.lines
+    ]
+    try:
+        job_id = assistant.check_batch_job(data.job_id or BatchRenderer.job_id_for(lines))
+    except BatchJobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    concurrency = max(1, min(data.concurrency or ENV_SETTINGS.TTS_BATCH_CONCURRENCY,
+                             ENV_SETTINGS.TTS_BATCH_MAX_CONCURRENCY))
+    use_sse = format == "sse" or (format is None and "text/event-stream" in request.headers.get("accept", ""))
+
+    async def progress_events():
+        try:
+            async for event in assistant.render_batch(lines, job_id=job_id, concurrency=concurrency):
+                payload = json.dumps(event, ensure_ascii=False)
+                yield f"event: {event['event']}\ndata: {payload}\n\n" if use_sse else f"{payload}\n"
+        except BatchJobConflict as e:
+            payload = json.dumps({"event": "error", "job_id": job_id, "reason": "conflict", "detail": str(e)})
+            yield f"event: error\ndata: {payload}\n\n" if use_sse else f"{payload}\n"
+
+    return StreamingResponse(
+        progress_events(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Batch-Job-Id": job_id}
+    )
+
+
+@voice_assistant_router.get("/batch-render/{job_id}", response_class=ORJSONResponse)
+async def batch_render_status(job_id: str):
+    if not assistant:
+        raise HTTPException(status_code=500, detail="Assistant not initialized")
+
+    try:
+        status = await asyncio.to_thread(assistant.get_batch_status, job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not status:
+        raise HTTPException(status_code=404, detail=f"Batch job {job_id} not found")
+    return status
+
+
+@voice_assistant_router.get("/tts-metrics", response_class=ORJSONResponse)
+async def tts_metrics():
+    if not assistant:
+        raise HTTPException(status_code=500, detail="Assistant not initialized")
+    return assistant.get_tts_metrics()
+
+
 @voice_assistant_router.get("/debug-session/{session_id}", response_class=ORJSONResponse)
 async def debug_session(session_id: str):
     return session_repo.get_debug_info(session_id)